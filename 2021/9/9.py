@@ -7,8 +7,12 @@ Day 9: Smoke Basin
 
 import sys
 import math
+import os
 from collections.abc import Generator, Iterable
 
+sys.path.append(os.path.abspath('../../util'))
+from Grid import label_regions
+
 def main():
     ex_data = get_input('./example.txt')
     data = get_input()
@@ -79,19 +83,12 @@ class Map:
     
     def basins(self) -> Generator[int, None, None]:
         '''generator of sizes of basins'''
-        for low_point in self.low_points():
-            yield self._basin_size(low_point)
-    
-    def _basin_size(self, initial_point: tuple[int, int, int]) -> int:
-        '''given a (low?) point, count the points in its basin'''
-        basin_maybe = {initial_point}
-        basin_yes = set()
-        while basin_maybe:
-            p = basin_maybe.pop()
-            if p[2] < 9:  # 9s are basin borders and not included
-                basin_yes.add(p)
-                basin_maybe.update(p for p in self.adj(*p) if p not in basin_yes)
-        return len(basin_yes)
+        # 9s are basin borders and not included; every other region is one basin
+        flat = [height for row in self.points for height in row]
+        regions = label_regions(flat, self.height, self.width, key=lambda height: height < 9)
+        for is_basin, size in zip(regions.values, regions.area):
+            if is_basin:
+                yield size
 
 
 if __name__ == '__main__':
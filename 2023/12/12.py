@@ -5,6 +5,7 @@ https://adventofcode.com/2023/day/12
 Day 12: Hot Springs
 """
 
+from concurrent.futures import ProcessPoolExecutor
 from functools import cache
 import re
 
@@ -36,22 +37,50 @@ def part_1(data):
     records = ((s[0],
                 tuple(int(n) for n in s[1].split(','))
                ) for s in data)
-    return sum(ways(syms, nums) for (syms, nums) in records)
+    return sum(arrangements(syms, nums) for (syms, nums) in records)
 
-def part_2(data):
+def part_2(data, workers: int = 1):
     '''Unfold your condition records;
     what is the new sum of possible arrangement counts?'''
-    records = ((unfold(s[0], '?'),
+    records = [(unfold(s[0], '?'),
                 tuple(int(n) for n in unfold(s[1], ',').split(','))
-               ) for s in data)
-    return sum(ways(syms, nums) for (syms, nums) in records)
+               ) for s in data]
+    if workers > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            return sum(pool.map(arrangements, *zip(*records), chunksize=64))
+    return sum(arrangements(syms, nums) for (syms, nums) in records)
 
 def unfold(orig: str, sep: str = '', n: int = 5) -> str:
     return sep.join(orig for _ in range(n))
 
+def arrangements(springs: str, nums: tuple[int, ...]) -> int:
+    '''Count arrangements by dynamic programming over (position, group), from the end.
+    Only two rows of the table are kept, and nothing outlives the call.'''
+    n = len(springs)
+    # run[i]: how many #/? in a row from i, so a group of k fits at i if run[i] >= k
+    run = [0] * (n + 1)
+    for i in range(n - 1, -1, -1):
+        run[i] = run[i + 1] + 1 if springs[i] != '.' else 0
+    # after[i]: ways to place no more groups in springs[i:], i.e. there's no # left
+    after = [0] * (n + 2)
+    after[n] = after[n + 1] = 1
+    for i in range(n - 1, -1, -1):
+        after[i] = after[i + 1] if springs[i] != '#' else 0
+    for k in reversed(nums):
+        here = [0] * (n + 2)
+        for i in range(n - 1, -1, -1):
+            # Leave springs[i] operational, if it can be
+            total = here[i + 1] if springs[i] != '#' else 0
+            # Or start the group here: it has to fit, and not run into another #
+            if run[i] >= k and (i + k == n or springs[i + k] != '#'):
+                total += after[i + k + 1]
+            here[i] = total
+        after = here
+    return after[0]
+
 @cache
 def ways(springs: str, nums: tuple[int, ...]) -> int:
-    '''recurse'''
+    '''recurse (the first way; see arrangements())'''
 
     if nums == ():  # No more '#' groups
         return 0 if '#' in springs else 1
@@ -5,8 +5,14 @@ https://adventofcode.com/2023/day/14
 Day 14: Parabolic Reflector Dish
 """
 
+from __future__ import annotations
 from typing import Sequence
 
+import sys
+import os
+sys.path.append(os.path.abspath('../../util'))
+from Util import after_steps
+
 def main():
     ex_data = get_input('./example.txt')
     data = get_input('./input.txt')
@@ -56,50 +62,57 @@ def load_e_row(row: str) -> int:
 def part_2(data: Sequence[Sequence[str]], cycles: int = 1_000_000_000) -> int:
     '''Run the spin cycle for 1000000000 cycles: North, West, South, East
     Afterward, what is the total load on the north support beams?'''
-    grid = Grid(data)
-    cache = {}
-    i = 0; i_max = 4 * cycles
-    while i < i_max:
-        grid.rotate_cw()
-        grid.tilt_e()
-        if (grid_str := str(grid)) in cache:
-            period = i - cache[grid_str]
-            remaining = i_max - i
-            i = i_max - (remaining % period)
-        else:
-            cache[grid_str] = i
-        i += 1
-    return grid.load_n
-
-class Grid:
+    rocks = Rocks(data)
+    return after_steps(rocks, Rocks.spin, cycles, key=Rocks.fingerprint).load_n
+
+class Rocks:
+    '''
+    The round rocks as one int bitmask over the whole platform: bit r * width + c.
+    width is one more than the number of columns, and that column is never open,
+    so rocks can't roll off the end of one row onto the next.
+    A tilt moves every rock that can move one step, all at once, until none can.
+    '''
     def __init__(self, grid: Sequence[Sequence[str]]):
-        self._grid: list[list[str]] = [list(row) for row in grid]
-    def __str__(self) -> str:
-        return '\n'.join(''.join(row) for row in self._grid)
-
-    def rotate_cw(self) -> None:
-        self._grid = [list(_) for _ in zip(*reversed(self._grid))]
+        self.rows, self.cols = len(grid), len(grid[0])
+        self.width = self.cols + 1
+        self.rounds = self._mask(grid, 'O')
+        self.open = self._mask(grid, 'O.')  # Not cube rocks
+        # Bit shift for one step in each direction
+        self._steps = {'N': -self.width, 'S': self.width, 'W': -1, 'E': 1}
+
+    def _mask(self, grid: Sequence[Sequence[str]], chars: str) -> int:
+        return sum(1 << (r * self.width + c)
+                   for r, row in enumerate(grid) for c, char in enumerate(row) if char in chars)
+
+    def tilt(self, direction: str) -> None:
+        '''Roll all round rocks as far as they go N, W, S or E.
+        Takes one pass (a few whole-platform int ops) per step of the longest roll, at most rows or cols.
+        Placing rocks by popcount per segment between cube rocks is ~14x slower here:
+        there are thousands of segments, and masking each one touches the whole int.'''
+        rounds, open_, step = self.rounds, self.open, self._steps[direction]
+        while True:
+            empty = open_ & ~rounds
+            moving = rounds & (empty >> step if step > 0 else empty << -step)
+            if not moving:
+                break
+            rounds ^= moving | (moving << step if step > 0 else moving >> -step)
+        self.rounds = rounds
+
+    def spin(self) -> Rocks:
+        '''One spin cycle: tilt north, west, south, then east. Returns self.'''
+        for direction in 'NWSE':
+            self.tilt(direction)
+        return self
+
+    def fingerprint(self) -> int:
+        return self.rounds
 
     @property
     def load_n(self) -> int:
-        return sum(i * row.count('O') for (i, row) in enumerate(self._grid[::-1], start=1))
-
-    def tilt_e(self) -> None:
-        for row in self._grid:
-            target = len(row) - 1
-            for i, c in etaremune(row):
-                if c == 'O':
-                    row[i] = '.'
-                    row[target] = 'O'
-                    target -= 1
-                elif c == '#':
-                    target = i - 1
-
-def etaremune(sequence: Sequence):
-    '''enumerate backward'''
-    for n in reversed(range(len(sequence))):
-        yield n, sequence[n]
-    
+        row_mask = (1 << self.cols) - 1
+        return sum((self.rows - r) * ((self.rounds >> (r * self.width)) & row_mask).bit_count()
+                   for r in range(self.rows))
+
 
 if __name__ == '__main__':
     import sys
@@ -14,6 +14,12 @@ import os
 from time import sleep
 from typing import NamedTuple, Sequence
 
+import sys
+sys.path.append(os.path.abspath('../../util'))
+from Display import Renderer, style
+from Grid import Grid_Directions
+from Util import strongly_connected_components
+
 def main():
     ex_data = get_input('./example.txt')
     data = get_input('./input.txt')
@@ -38,16 +44,24 @@ def get_input(file='./input.txt'):
 def part_1(data, watch: bool = False, delay: float = 0.05) -> int:
     '''With the beam starting in the top-left heading right,
     how many tiles end up being energized?'''
-    return light_it_up(data, start=Beam(Point(0, 0), Velocity(0, 1)), watch=watch, delay=delay)
+    start = Beam(Point(0, 0), Velocity(0, 1))
+    if watch:
+        return light_it_up(data, start=start, watch=watch, delay=delay)
+    return Contraption(data).energized(start)
 
 def part_2(data, watch: bool = False, delay: float = 0.05, inter_delay: float = 0) -> int:
     '''Find the initial beam configuration that energizes the largest number of tiles;
     how many tiles are energized in that configuration?'''
     n_rows = len(data)
     n_cols = len(data[0])
+    if watch:
+        lit = Grid_Directions(n_rows, n_cols)  # Reused by every run
+        energized = lambda beam: light_it_up(data, start=beam, watch=watch,
+                                             delay=delay, inter_delay=inter_delay, lit=lit)
+    else:
+        energized = Contraption(data).energized
     return max(
-        light_it_up(data, start=Beam(p, v), watch=watch,
-                    delay=delay, inter_delay=inter_delay)
+        energized(Beam(p, v))
         for p, v in itertools.chain(
             ((Point(0,        c), Velocity( 1,  0)) for c in range(n_cols)),
             ((Point(n_rows-1, c), Velocity(-1,  0)) for c in range(n_cols)),
@@ -57,11 +71,15 @@ def part_2(data, watch: bool = False, delay: float = 0.05, inter_delay: float =
     )
 
 def light_it_up(data, start: Beam, watch: bool = False,
-                delay: float = 0.05, inter_delay: float = 0) -> int:
+                delay: float = 0.05, inter_delay: float = 0,
+                lit: Grid_Directions|None = None) -> int:
     beams = deque([start])
-    lit = [[Direction(0) for p in row] for row in data]
+    if lit is None:
+        lit = Grid_Directions(len(data), len(data[0]))
+    else:
+        lit.reset()
     if watch:
-        display = Display(data)
+        display = Display(data, delay=delay)
         display.highlight = [beams[0].loc]
         sleep(inter_delay)
     else:
@@ -70,20 +88,18 @@ def light_it_up(data, start: Beam, watch: bool = False,
         # Refresh display every cycle
         if display:
             display.print(lit, beams)
-            sleep(delay)
 
         # Split/reflect all beams
         for _ in range(len(beams)):
             beam = beams.popleft()
             p = beam.loc
-            # If already passed this tile in this direction:
-            if beam.direction in lit[p.r][p.c]:
+            # Light this tile (record which in which directions we've passed),
+            # unless already passed this tile in this direction:
+            if not lit.add(lit.flat_index(*p), beam.direction.value):
                 continue  # ... let it die
-            # Light this tile (record which in which directions we've passed)
-            lit[p.r][p.c] |= beam.direction
             # Interact with tile
             tile = data[p.r][p.c]
-            beams.extend(b for b in beam.reflected(tile) if b not in beams)
+            beams.extend(beam.reflected(tile))  # Any duplicates die next time
 
         # Move all beams
         for _ in range(len(beams)):
@@ -93,11 +109,83 @@ def light_it_up(data, start: Beam, watch: bool = False,
                 beams.append(beam)
                 # Else let it die
 
-    return sum(sum(tile != Direction.NONE for tile in row) for row in lit)
+    if display:
+        display.close()
+    return lit.count()
 
 def in_bounds(data: Sequence[Sequence], point: Point) -> bool:
     return (0 <= point.r < len(data)) and (0 <= point.c < len(data[0]))
 
+
+class Contraption:
+    '''
+    The grid as a graph of splitters. Between splitters, a beam's path is fixed,
+    so each segment is traced once, and the tiles it energizes kept as a bitset (an int).
+    Each splitter energizes everything reachable from it: loops are collapsed to
+    strongly connected components, and each component's bitset is the union of its
+    own segments' and its successors'. Any start is then one segment plus a lookup.
+    '''
+
+    def __init__(self, data: Sequence[str]) -> None:
+        self.grid = data
+        self.rows = len(data)
+        self.cols = len(data[0])
+        # splitter tile index -> (tiles it and its two outgoing segments energize, splitters they hit)
+        self.splitters: dict[int, tuple[int, list[int]]] = {}
+        todo = [i for i in range(self.rows * self.cols) if data[i // self.cols][i % self.cols] in '|-']
+        for i in todo:
+            r, c = divmod(i, self.cols)
+            outs = ((-1, 0), (1, 0)) if data[r][c] == '|' else ((0, -1), (0, 1))
+            bits, ends = 1 << i, []
+            for dr, dc in outs:
+                seg_bits, end = self.segment(r + dr, c + dc, dr, dc)
+                bits |= seg_bits
+                if end is not None:
+                    ends.append(end)
+            self.splitters[i] = (bits, ends)
+        # Everything energized from each splitter, built up from the sinks
+        self.reach: dict[int, int] = {}
+        for component in strongly_connected_components(self.splitters, lambda i: self.splitters[i][1]):
+            bits = 0
+            for i in component:
+                own, ends = self.splitters[i]
+                bits |= own
+                for end in ends:
+                    bits |= self.reach.get(end, 0)  # Not yet there if in this component
+            for i in component:
+                self.reach[i] = bits
+
+    def segment(self, r: int, c: int, dr: int, dc: int) -> tuple[int, int|None]:
+        '''Follow a beam entering (r, c) heading (dr, dc) through mirrors and along splitters,
+        until it hits a splitter side-on or leaves the grid.
+        Return the tiles energized (not counting that splitter) and that splitter's index, if any.'''
+        grid, rows, cols = self.grid, self.rows, self.cols
+        bitmap = bytearray((rows * cols + 7) // 8)
+        seen: set[tuple[int, int, int, int]] = set()
+        end = None
+        while 0 <= r < rows and 0 <= c < cols:
+            tile = grid[r][c]
+            if (tile == '|' and dc) or (tile == '-' and dr):
+                end = r * cols + c
+                break
+            if (r, c, dr, dc) in seen:
+                break  # A loop of mirrors
+            if tile in '/\\':
+                seen.add((r, c, dr, dc))
+                dr, dc = (-dc, -dr) if tile == '/' else (dc, dr)
+            i = r * cols + c
+            bitmap[i >> 3] |= 1 << (i & 7)
+            r += dr
+            c += dc
+        return int.from_bytes(bitmap, 'little'), end
+
+    def energized(self, start: Beam) -> int:
+        '''How many tiles does a beam starting at start energize?'''
+        bits, end = self.segment(*start.loc, *start.vel)
+        if end is not None:
+            bits |= self.reach[end]
+        return bits.bit_count()
+
 class classproperty:
     def __init__(self, func):
         self._func = func
@@ -188,88 +276,33 @@ class Beam:
         return self.vel.direction
 
 class Display:
-    def __init__(self, grid) -> None:
+    def __init__(self, grid, delay: float = 0.05, drop: bool = False) -> None:
         self.grid = grid
         self.rows = len(self.grid)
         self.cols = len(self.grid[0])
         self.highlight: Sequence[Point] = []
-        term = os.get_terminal_size()
-        if self.rows >= term.lines:
-            print(f'Warning: grid len {self.rows} too tall for terminal {term.columns=} {term.lines=}')
-        self._started = False
-
-    def _prep(self) -> None:
-        print(control.HIDE_CURSOR)
-        print('\n' * (self.rows+1), end='')
-
-    def _back_up(self) -> None:
-        print(f'\x1b[{self.rows}F', end='')
-
-    def print(self, lit, beams) -> None:
-        if not self._started:
-            self._prep()
-            self._started = True
-        self._back_up()
+        self.renderer = Renderer(self.rows, self.cols, interval=delay, drop=drop)
+
+    def print(self, lit, beams, force: bool = False) -> None:
+        if not (force or self.renderer.due()):
+            return  # Don't bother building a frame that won't be drawn
         beam_chars = {beam.loc: beam.character for beam in beams}
-        for r, row in enumerate(self.grid):
-            for c, tile in enumerate(row):
-                if Point(r, c) in self.highlight:
-                    print(style.BG.GREEN, end='')
-                try:
-                    print(style.BOLD, style.FG.YELLOW,
-                        beam_chars[Point(r, c)],
-                        style.RESET,
-                        sep= '', end='')
-                except KeyError:
-                    print(style.BOLD + style.FG.YELLOW if lit[r][c] else '',
-                        tile,
-                        style.RESET,
-                        sep= '', end='')
-            print()
-        print(n_lit(lit) + len(beams), '\r', sep='', end='')
-        pass
-
-def n_lit(lit) -> int:
-    return sum(sum(d != Direction.NONE for d in row) for row in lit)
-
-
-class _fg(NamedTuple):
-    BLACK =   '\x1b[30m'
-    RED =     '\x1b[31m'
-    GREEN =   '\x1b[32m'
-    YELLOW =  '\x1b[33m'
-    BLUE =    '\x1b[34m'
-    MAGENTA = '\x1b[35m'
-    CYAN =    '\x1b[36m'
-    WHITE =   '\x1b[37m'
-
-class _bg(NamedTuple):
-    BLACK =   '\x1b[40m'
-    RED =     '\x1b[41m'
-    GREEN =   '\x1b[42m'
-    YELLOW =  '\x1b[43m'
-    BLUE =    '\x1b[44m'
-    MAGENTA = '\x1b[45m'
-    CYAN =    '\x1b[46m'
-    WHITE =   '\x1b[47m'
-
-class style(NamedTuple):
-    RESET =         '\x1b[0m'
-    BOLD =          '\x1b[1m'
-    FAINT =         '\x1b[2m'
-    ITALIC =        '\x1b[3m'
-    UNDERLINED =    '\x1b[4m'
-    INVERSE =       '\x1b[7m'
-    STRIKETHROUGH = '\x1b[9m'
-    FG = _fg
-    BG = _bg
-
-class control(NamedTuple):
-    SHOW_CURSOR = '\x1b[?25h'
-    HIDE_CURSOR = '\x1b[?25l'
-    ERASE_CURSOR_TO_END = '\x1b[0J'
-    ERASE_CURSOR_TO_START = '\x1b[1J'
-    ERASE_SCREEN = '\x1b[2J'
+        frame = [[self.cell(Point(r, c), tile, lit, beam_chars) for c, tile in enumerate(row)]
+                 for r, row in enumerate(self.grid)]
+        self.renderer.draw(frame, status=str(n_lit(lit) + len(beams)), force=force)
+
+    def cell(self, p: Point, tile: str, lit, beam_chars: dict[Point, str]) -> str:
+        highlight = style.BG.GREEN if p in self.highlight else ''
+        if p in beam_chars:
+            return highlight + style.BOLD + style.FG.YELLOW + beam_chars[p]
+        return highlight + (style.BOLD + style.FG.YELLOW if lit.get(lit.flat_index(*p)) else '') + tile
+
+    def close(self) -> None:
+        self.renderer.close()
+
+def n_lit(lit: Grid_Directions) -> int:
+    return lit.count()
+
 
 if __name__ == '__main__':
     import sys
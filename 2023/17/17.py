@@ -5,11 +5,13 @@ https://adventofcode.com/2023/day/17
 Day 17: Clumsy Crucible
 """
 
+from collections.abc import Iterator
 from dataclasses import dataclass
-from itertools import pairwise
-from math import inf
 from typing import ClassVar, Sequence
 
+import sys; import os; sys.path.append(os.path.abspath('../../util'))
+from Paths import astar
+
 
 def main():
     ex_data = get_input('./example.txt')
@@ -18,14 +20,14 @@ def main():
     print('example 1:')
     print(part_1(ex_data), '= 102?')
     
-    #print('\npart 1:')
-    #print(part_1(data))
+    print('\npart 1:')
+    print(part_1(data))
     
-    #print('\nexample 2:')
-    #print(part_2(ex_data), '= _?')
+    print('\nexample 2:')
+    print(part_2(ex_data), '= 94?')
     
-    #print('\npart 2:')
-    #print(part_2(data))
+    print('\npart 2:')
+    print(part_2(data))
 
 def get_input(file='./input.txt'):
     with open(file, 'r') as f:
@@ -38,12 +40,21 @@ def part_1(data):
     but not moving more than three consecutive blocks in the same direction,
     what is the least heat loss it can incur?'''
     grid = Grid(data, start=(0+0j), end=None)
-    return grid.recurse()
+    return grid.least_heat_loss(min_straight=1, max_straight=3)
 
 def part_2(data):
-    '''assignment'''
+    '''Once an ultra crucible starts moving in a direction, it needs to move
+    a minimum of four blocks in that direction before it can turn,
+    and can move a maximum of ten consecutive blocks without turning.
+    What is the least heat loss it can incur?'''
+    grid = Grid(data, start=(0+0j), end=None)
+    return grid.least_heat_loss(min_straight=4, max_straight=10)
+
 
-count = 0
+# A state is a position plus the axis of the last straight run (True: horizontal),
+# or None at the start. Each edge is a whole straight run after a turn, so runs
+# never need to be counted: from a state, the only moves are turns.
+type State = tuple[complex, bool|None]
 
 @dataclass
 class Grid:
@@ -53,66 +64,36 @@ class Grid:
     DIRS: ClassVar[Sequence[complex]] = ((-1+0j), (0+1j), (1+0j), (0-1j))  # N, E, S, W
 
     def __post_init__(self) -> None:
-        #self.max_row: int = sum(1 for p in data if p.imag == 0) - 1
-        #self.max_col: int = sum(1 for p in data if p.real == 0) - 1
         self.max_row: int = int(max(p.real for p in self.values if p.imag == 0))
         self.max_col: int = int(max(p.imag for p in self.values if p.real == 0))
         if self.end is None:
             self.end = complex(self.max_row, self.max_col)
-        self.costs: dict[complex, int|float] = {v: inf for v in self.values.keys()}
-        pass
 
     def in_bounds(self, point: complex) -> bool:
         return (0 <= point.real <= self.max_row) and (0 <= point.imag <= self.max_col)
 
-    def possible_moves(self, path: list[complex], max_straight: int = 3) -> list[complex]:
-        nogo = no_go_dirs(path, max_straight)
-        poss = [path[-1] + dir for dir in self.DIRS if dir not in nogo]
-        poss = [p for p in poss if self.in_bounds(p) and p not in path]
-        return poss
-
-    def recurse(self, path: list[complex]|None = None, cost: int = 0) -> int:
-        global count
-        count += 1
-        if path is None:
-            path = [self.start]
-        if path[-1] == self.end:
-            return cost + self.values[path[-1]]
-        poss = self.possible_moves(path)
-        if not poss:
-            return inf
-        costs = []
-        for move in poss:
-            new_path = path + [move]
-            new_cost = self.recurse(new_path, cost + self.values[move])
-            costs.append(new_cost)
-        best = min(costs)
-        return best
-        #return min(self.recurse(path + [move], cost) for move in self.possible_moves(path))
-
-def no_go_dirs(path: Sequence[complex], max_straight: int = 3) -> list[complex]:
-    no_gos: list[complex] = []
-    last_dirs = last_dirs_from_path(path, max_straight)
-    try:
-        no_gos.append(reverse(last_dirs[-1]))
-    except IndexError:
-        pass
-    if (len(last_dirs) == max_straight
-        and all(last_dirs[0] == d for d in last_dirs[1:])
-       ):
-        no_gos.append(last_dirs[0])
-    return no_gos
-
-def last_dirs_from_path(path: Sequence[complex], n: int = 3) -> list[complex]:
-    return [p2 - p1 for p1, p2 in pairwise(path[-n-1:])]
-
-def reverse(dir: complex) -> complex:
-    return {
-        (-1+0j): ( 1+0j),
-        ( 0+1j): ( 0-1j),
-        ( 1+0j): (-1+0j),
-        ( 0-1j): ( 0+1j),
-    }[dir]
+    def least_heat_loss(self, min_straight: int, max_straight: int) -> int:
+        '''Shortest path over turns, with the heat lost along each straight run as its weight.'''
+        assert self.end is not None
+        end = self.end
+        def runs(state: State) -> Iterator[tuple[State, int]]:
+            point, horizontal = state
+            for dir in self.DIRS:
+                if horizontal is not None and (dir.real == 0) == horizontal:
+                    continue  # Must turn
+                loss = 0
+                for n in range(1, max_straight+1):
+                    if (there := point + n*dir) not in self.values:
+                        break
+                    loss += self.values[there]
+                    if n >= min_straight:
+                        yield (there, dir.real == 0), loss
+        def heuristic(state: State) -> int:
+            # Every block loses at least 1
+            return int(abs(end.real - state[0].real) + abs(end.imag - state[0].imag))
+        targets = ((end, True), (end, False))
+        found = astar((self.start, None), runs, targets=targets, heuristic=heuristic)
+        return int(found.best(targets))
 
 
 if __name__ == '__main__':
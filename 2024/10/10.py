@@ -6,11 +6,12 @@ Day 10: Hoof It
 """
 
 from __future__ import annotations
+from typing import NamedTuple
 
 import sys 
 import os
 sys.path.append(os.path.abspath('../../util'))
-from Grid import Grid_Immutable as Grid
+from Grid import Grid_Flat as Grid
 
 
 def main():
@@ -36,7 +37,40 @@ def get_input(file='./input.txt'):
 
 def part_1(data: Grid) -> int:
     '''What is the sum of the *scores* of all trailheads on your topographic map?'''
-    return sum(score(data, trailhead) for trailhead in data.find_all(0))
+    #return sum(score(data, trailhead) for trailhead in data.find_all(0))
+    trails = Trails.from_grid(data)
+    return sum(trails.summits[i].bit_count() for i in trails.trailheads)
+
+class Trails(NamedTuple):
+    '''For each cell (by flat index), which summits its trails reach, as a bitset of summit numbers,
+    and how many distinct trails there are to them.'''
+    trailheads: list[int]
+    summits: list[int]
+    ratings: list[int]
+
+    @classmethod
+    def from_grid(cls, grid: Grid[int], top: int = 9) -> Trails:
+        '''One pass over the cells from the top height down: every cell's trails
+        are the trails of its neighbors one higher, which are already done.
+        Unlike a search from each trailhead, trails shared between trailheads are only followed once.'''
+        heights = grid.cells
+        table = grid.neighbor_table()
+        by_height: list[list[int]] = [[] for _ in range(top + 1)]
+        for i, height in enumerate(heights):
+            if 0 <= height <= top:
+                by_height[height].append(i)
+        summits = [0] * len(heights)
+        ratings = [0] * len(heights)
+        for n, i in enumerate(by_height[top]):
+            summits[i] = 1 << n
+            ratings[i] = 1
+        for height in range(top - 1, -1, -1):
+            for i in by_height[height]:
+                for neighbor in table[i*4 : i*4+4]:
+                    if neighbor >= 0 and heights[neighbor] == height + 1:
+                        summits[i] |= summits[neighbor]
+                        ratings[i] += ratings[neighbor]
+        return cls(by_height[0], summits, ratings)
 
 def score(grid: Grid[int], trailhead: tuple[int, int]) -> int:
     return len(ends(grid, *trailhead))
@@ -55,7 +89,9 @@ def ends(grid: Grid[int], start_row: int, start_col: int) -> set[tuple[int, int]
 
 def part_2(data: Grid) -> int:
     '''What is the sum of the *ratings* of all trailheads?'''
-    return sum(rating(data, *trailhead) for trailhead in data.find_all(0))
+    #return sum(rating(data, *trailhead) for trailhead in data.find_all(0))
+    trails = Trails.from_grid(data)
+    return sum(trails.ratings[i] for i in trails.trailheads)
 
 def rating(grid: Grid[int], start_row: int, start_col: int) -> int:
     here_val = grid[start_row][start_col]
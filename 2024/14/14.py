@@ -8,11 +8,16 @@ Day 14: Restroom Redoubt
 from __future__ import annotations
 from collections import Counter
 from collections.abc import Sequence
-from math import lcm, prod
+from math import gcd, lcm, prod
 import re
 from statistics import mean, pstdev, pvariance
 from typing import NamedTuple
 
+try:
+    import numpy as np  # type: ignore
+except ImportError:
+    np = None
+
 import sys 
 import os
 sys.path.append(os.path.abspath('../../util'))
@@ -48,6 +53,43 @@ def part_2(data: Sequence[tuple[RCPair, RCPair]],
            size: RCPair = RCPair(row=103, col=101)) -> int:
     '''What is the fewest number of seconds that must elapse
     for the robots to display a picture of a Christmas tree?'''
+    # Rows repeat every size.rows seconds and columns every size.cols,
+    # so find the clumpiest time for each separately and combine them.
+    if gcd(*size) == 1:
+        return clumpiest_crt(data, size)
+    return clumpiest_scan(data, size)
+
+def clumpiest_crt(data: Sequence[tuple[RCPair, RCPair]], size: RCPair) -> int:
+    '''Time of lowest variance, by Chinese remainder theorem:
+    row variance only depends on t % size.rows, and column variance on t % size.cols,
+    so minimize each over its own period (rows + cols steps, not rows * cols).'''
+    t_row = min_variance_time([p.row for p, _ in data], [v.row for _, v in data], size.rows)
+    t_col = min_variance_time([p.col for p, _ in data], [v.col for _, v in data], size.cols)
+    # t = t_col (mod cols), t = t_row (mod rows)
+    return t_col + size.cols * ((t_row - t_col) * pow(size.cols, -1, size.rows) % size.rows)
+
+def min_variance_time(starts: Sequence[int], velocities: Sequence[int], period: int) -> int:
+    '''Time in range(period) when positions along one axis have the lowest variance'''
+    if np is not None:
+        times = np.arange(period)[:, None]
+        locs = (np.array(starts) + times * np.array(velocities)) % period
+        return int(locs.var(axis=1).argmin())
+    return min(range(period), key=lambda t: pvariance((s + t*v) % period
+                                                       for s, v in zip(starts, velocities)))
+
+def clumpiest_scan(data: Sequence[tuple[RCPair, RCPair]], size: RCPair) -> int:
+    '''Time of lowest variance, trying every time until the pattern repeats'''
+    if np is not None:
+        return int(scan_variances(data, size).argmin())
+    return min(range(lcm(*size)), key=lambda i: variance(move_all(data, size, i)))
+
+def variance(bots: Sequence[RCPair]) -> float:
+    '''Inverse clumpiness: total (population) variance of rows and columns'''
+    return pvariance(loc.row for loc in bots) + pvariance(loc.col for loc in bots)
+
+def clumpiest_survey(data: Sequence[tuple[RCPair, RCPair]], size: RCPair) -> int:
+    '''Time of lowest variance, comparing three measures of clumpiness at every time.
+    Not used: how I found that variance is the measure to use.'''
     # This is tricky! Xmas tree pattern is not specified.
     # Honestly, this is reverse-engineered from the answer, which I first got by looking
     # through the grids with the lowest safety factor.
@@ -69,7 +111,7 @@ def part_2(data: Sequence[tuple[RCPair, RCPair]],
         bots = move_all(data, size, i)  # Iteration from last locs is maybe faster, but not much.
         overlaps.append((i, n_robots - len(set(bots))))
         safeties.append((i, safety_factor(bots, size)))
-        variances.append((i, pvariance(loc.row for loc in bots) + pvariance(loc.col for loc in bots)))
+        variances.append((i, variance(bots)))
     
     # 1. Zero (or least) overlaps:
     least_overlappy = sorted(overlaps, key=lambda item: item[1])
@@ -100,6 +142,21 @@ def part_2(data: Sequence[tuple[RCPair, RCPair]],
     return clumpiest[0][0]
 
 
+def scan_variances(data: Sequence[tuple[RCPair, RCPair]], size: RCPair, chunk: int = 1024) -> np.ndarray:
+    '''Variance at every time until the pattern repeats,
+    computed for chunk time steps at once as NumPy array reductions.'''
+    starts = np.array([tuple(p) for p, _ in data])  # (robots, 2)
+    velocities = np.array([tuple(v) for _, v in data])
+    dims = np.array(tuple(size))
+    n_steps = lcm(*size)
+    variances = []
+    for first in range(0, n_steps, chunk):
+        times = np.arange(first, min(first + chunk, n_steps))[:, None, None]
+        locs = (starts + times * velocities) % dims  # (times, robots, 2)
+        variances.append(locs.var(axis=1).sum(axis=1))
+    return np.concatenate(variances)
+
+
 def move_all(data: Sequence[tuple[RCPair, RCPair]],
             size: RCPair, n: int) -> list[RCPair]:
     '''Move from all points by respective velocities n times'''
@@ -8,14 +8,13 @@ Day 16: Reindeer Maze
 from __future__ import annotations
 from collections.abc import Callable, Iterable, Sequence
 from dataclasses import dataclass, InitVar, field
-from heapq import heappop, heappush
 from itertools import pairwise
 from typing import NamedTuple
 
 import sys; import os; sys.path.append(os.path.abspath('../../util'))
-from Grid import Direction, Grid_Immutable, Grid_Mutable, Point
-from Intfinity import intfinity as inf
+from Grid import Direction, Grid_Flat, Grid_Mutable, Point
 from Display import style
+from Paths import ShortestPaths, dijkstra
 
 
 def main():
@@ -38,17 +37,13 @@ def get_input(file='./input.txt'):
 def part_1(data: Maze) -> int:
     '''Analyze your map carefully. What is the lowest score a Reindeer could possibly get?'''
     maze = data
-    maze.dijkstra()
     return maze.lowest_cost()
 
 def part_2(data: Maze) -> int:
     '''How many tiles are part of at least one of the best paths through the maze?'''
     maze = data
-    # Dijkstra's was run in part_1, same object
-    paths = maze.best_paths()
-    #maze.print_paths(paths)
-    visited = set(node.point for path in paths for node in path)
-    return len(visited)
+    #maze.print_paths(maze.best_paths())
+    return len({node.point for node in maze.solved.on_paths(maze._end_nodes, multi=True)})
 
 
 class Node(NamedTuple):
@@ -57,8 +52,8 @@ class Node(NamedTuple):
 
 @dataclass
 class Maze:
-    '''Represent a maze as a Grid_Immutable plus more metadata and functions for solving.'''
-    grid: Grid_Immutable[str]           = field(init=False)
+    '''Represent a maze as a Grid_Flat plus more metadata and functions for solving.'''
+    grid: Grid_Flat[str]                = field(init=False)
     grid_data: InitVar[Iterable[Iterable[str]]|str]
     step_cost: int = 1
     turn_cost: int = 1000
@@ -67,14 +62,13 @@ class Maze:
     _start_node: Node                   = field(init=False, repr=False)
     end: Point                          = field(init=False, repr=False)
     _end_nodes: tuple[Node, ...]        = field(init=False, repr=False)
-    costs: dict[Node, int]              = field(init=False, repr=False)
     graph: dict[Node, dict[Node, int]]  = field(init=False, repr=False)
-    parents: dict[Node, list[Node]]     = field(init=False, repr=False)
+    _solved: ShortestPaths[Node]|None   = field(init=False, repr=False, default=None)
 
     _DIRECTIONS: tuple[Direction, ...] = (Direction.N, Direction.E, Direction.S, Direction.W)
 
     def __post_init__(self, grid_data):
-        self.grid: Grid_Immutable[str] = Grid_Immutable(grid_data)
+        self.grid: Grid_Flat[str] = Grid_Flat(grid_data)
         self.start = self.grid.find('S')
         self._start_node = Node(self.start, self.start_dir)
         self.end = self.grid.find('E')
@@ -82,8 +76,6 @@ class Maze:
         self.graph = {Node(point, dir): self._node_weights(point, dir)
                       for point, char in self.grid.iter_all() if char != '#'
                       for dir in self._DIRECTIONS}
-        self.costs: dict[Node, int] = {node: inf for node in self.graph}
-        self.parents = {node: [] for node in self.graph}
     
     def _node_weights(self, point: Point, dir: Direction) -> dict[Node, int]:
         '''Generate weights from a Node (Point + Direction) to neighboring Nodes.'''
@@ -98,59 +90,46 @@ class Maze:
     def __str__(self) -> str:
         return str(self.grid)
 
-    def dijkstra(self) -> None:
-        '''Use Dijkstra's algorithm to walk the graph, finding best cost from start to each node.
-        Resulting costs stored in self.costs.'''
-        self.costs[self._start_node] = 0
-        todo: list[tuple[int, int, Node]] = [(0, x:=0, self._start_node)]
-        processed = set()
-        while todo:
-            _, _, node = heappop(todo)
-            if node in processed:
-                continue
-            processed.add(node)
-            cost_here = self.costs[node]
-            for step, weight in self.graph[node].items():
-                if (cost_there := cost_here + weight) < self.costs[step]:
-                    self.costs[step] = cost_there
-                    heappush(todo, (self.costs[step], x:=x+1, step))  # Dijkstra
-                    #heappush(todo, (self.costs[step] + self.min_cost_to_end(step), x:=x+1, step))  # A*
-                    self.parents[step] = [node]
-                elif cost_there == self.costs[step]:
-                    self.parents[step] += [node]
+    @property
+    def solved(self) -> ShortestPaths[Node]:
+        '''Best costs and all best parents of each node, from a search run on first use.'''
+        if self._solved is None:
+            self._solved = self.dijkstra()  # A* prunes almost nothing here, and its heuristic costs more
+            #self._solved = self.astar()
+        return self._solved
+
+    def dijkstra(self) -> ShortestPaths[Node]:
+        '''Use Dijkstra's algorithm to walk the graph, finding best cost from start to each node.'''
+        return dijkstra(self._start_node, self.graph, targets=self._end_nodes)
+
+    def astar(self) -> ShortestPaths[Node]:
+        '''A* search: Dijkstra's guided by min_cost_to_end().'''
+        return dijkstra(self._start_node, self.graph, targets=self._end_nodes,
+                        heuristic=self.min_cost_to_end)
 
     def min_cost_to_end(self, node: Node) -> int:
         '''Minimum cost from any (point, direction) to end.
         For use in heuristic for A* algorithm.'''
         vector = self.end - node.point
-        taxi_dist = vector.row + vector.col
+        taxi_dist = abs(vector.row) + abs(vector.col)
         dirs_to_end = vector.component_row.direction | vector.component_col.direction
-        if node.dir == dirs_to_end:  # Pointing at end
+        if not dirs_to_end:  # At end
             turns = 0
-        elif node.dir in dirs_to_end:  # Pointing in one direction needed, or perp. but aligned
+        elif node.dir == dirs_to_end:  # Pointing straight at end
+            turns = 0
+        elif node.dir in dirs_to_end or node.dir.opposite not in dirs_to_end:
+            # Pointing in one direction needed, or perp. but aligned
             turns = 1
-        else:
+        else:  # Pointing away
             turns = 2
         return (self.step_cost * taxi_dist) + (self.turn_cost * turns)
 
     def lowest_cost(self) -> int:
-        return min(self.costs[node] for node in self._end_nodes)
+        return int(self.solved.best(self._end_nodes))
     
     def best_paths(self) -> list[list[Node]]:
-        '''List of all paths start->end with best total cost.
-        Reverse BFS of sorts from end. Or should I just store parents in dijkstra()?'''
-        best_cost = self.lowest_cost()
-        incomplete_paths = [[node] for node, cost in self.costs.items()
-                            if node.point == self.end and cost == best_cost]
-        paths = []
-        while incomplete_paths:
-            path = incomplete_paths.pop()
-            if (here := path[-1]) == self._start_node:
-                paths.append(path[::-1])
-                continue
-            parents = self.parents[here]
-            incomplete_paths.extend(path + [parent] for parent in parents)
-        return paths
+        '''List of all paths start->end with best total cost.'''
+        return list(self.solved.paths(self._end_nodes, multi=True))
 
     def path_cost(self, path: Sequence[Point]|Sequence[Node]) -> int:
         '''Calculate total cost of a path.'''
@@ -5,8 +5,9 @@ https://adventofcode.com/2021/day/17
 Day 17: Chronospatial Computer
 """
 
-from collections.abc import Iterator, Sequence
+from collections.abc import Callable, Iterable, Iterator, Sequence
 from dataclasses import InitVar, dataclass, field
+from functools import cached_property
 from typing import NamedTuple
 
 
@@ -73,25 +74,155 @@ class Program(tuple[int]):
 
     def run_a(self, A: int) -> tuple[int, ...]:
         '''run() but given only A, since the rest of state is irrelevant.'''
-        return tuple(self.run(State(A=A, B=0, C=0)))
+        return self.compiled(A)
+
+    def run_many(self, As: Iterable[int], B: int = 0, C: int = 0) -> list[tuple[int, ...]]:
+        '''Outputs for each of many initial values of A, in one call.'''
+        run = self.compiled
+        return [run(A, B, C) for A in As]
+
+    @cached_property
+    def compiled(self) -> Callable[..., tuple[int, ...]]:
+        '''The program as a Python function (A, B=0, C=0) -> outputs,
+        translated once to straight-line code on local ints. See source().'''
+        namespace: dict = {}
+        exec(compile(self.source(), f'<program {",".join(map(str, self))}>', 'exec'), namespace)
+        return namespace['run']
+
+    def source(self) -> str:
+        '''Python source for compiled. Instructions run in basic blocks, which start
+        at 0 and wherever a jump can land. Each block is straight-line code,
+        so the dispatch on ip only happens at block boundaries.'''
+        blocks = self._blocks()
+        lines = ['def run(A, B=0, C=0):',
+                 '    out = []',
+                 '    emit = out.append',
+                 '    ip = 0',
+                 '    while True:']
+        for start, end in blocks.items():
+            lines.append(f'        if ip == {start}:')
+            for ip in range(start, end, 2):
+                if self[ip] != 3:
+                    lines.append('            ' + self._statement(self[ip], self[ip + 1]))
+            if end > start and self[end - 2] == 3:
+                lines += ['            if A:', *self._goto(self[end - 1], '                ')]
+            lines += self._goto(end, '            ')
+        return '\n'.join(lines) + '\n'
+
+    def _blocks(self) -> dict[int, int]:
+        '''Basic blocks reachable from 0, as {start: end}.
+        A block ends after a jump, or where another block starts.'''
+        starts: set[int] = set()
+        todo = [0]
+        while todo:
+            ip = todo.pop()
+            if ip in starts or ip >= len(self) - 1:
+                continue
+            starts.add(ip)
+            while ip < len(self) - 1:
+                ip += 2
+                if self[ip - 2] == 3:
+                    todo += [self[ip - 1], ip]
+                    break
+        ordered = sorted(starts)
+        blocks = {}
+        for start in ordered:
+            end = start
+            while end < len(self) - 1:
+                end += 2
+                if self[end - 2] == 3 or end in starts:
+                    break
+            blocks[start] = end
+        return blocks
+
+    def _goto(self, ip: int, indent: str) -> list[str]:
+        if ip >= len(self) - 1:  # off the end
+            return [indent + 'return tuple(out)']
+        return [indent + f'ip = {ip}', indent + 'continue']
+
+    @staticmethod
+    def _statement(opcode: int, operand: int) -> str:
+        '''One instruction (other than jnz) as a Python statement'''
+        if operand == 7 and opcode in (0, 2, 5, 6, 7):
+            raise ValueError(f'Invalid combo operand: {operand}')
+        combo = ('0', '1', '2', '3', 'A', 'B', 'C', '')[operand]
+        match opcode:
+            case 0: return f'A >>= {combo}'
+            case 1: return f'B ^= {operand}'
+            case 2: return f'B = {combo} & 7'
+            case 4: return 'B ^= C'
+            case 5: return f'emit({combo} & 7)'
+            case 6: return f'B = A >> {combo}'
+            case 7: return f'C = A >> {combo}'
+        raise ValueError(f'Invalid opcode: {opcode}')
     
     def find_quine(self) -> int:
         '''
         Part 2: What is the lowest positive initial value for register A
                 that causes the program to output a copy of itself?
-        Really a convenience wrapper around the recursive generator find_a().
+        Solved digit by digit if the program is a simple shift loop (see digit_step()),
+        else by the recursive generator find_a().
         '''
+        if (step := self.digit_step()) is not None:
+            return self.solve_digits(self, step)
         return next(self.find_a(self))
 
+    def digit_step(self) -> Callable[[int], int]|None:
+        '''
+        If the program is one loop, "output something of A; A >>= 3; jnz 0",
+        where B and C are set from A before they're read, return the function
+        from A to the output digit of one pass through the loop. Else None.
+        Then output i depends only on A >> 3*i, so digits can be solved one at a time.
+        '''
+        body = [(self[ip], self[ip + 1]) for ip in range(0, len(self) - 1, 2)]
+        if len(self) < 2 or len(self) % 2 or body[-1] != (3, 0):
+            return None
+        body = body[:-1]
+        if sum(op == 5 for op, _ in body) != 1 or [i for i in body if i[0] in (0, 3)] != [(0, 3)]:
+            return None
+        assigned: set[str] = set()
+        for opcode, operand in body:
+            reads = {1: 'B', 4: 'BC'}.get(opcode, '')
+            if opcode in (0, 2, 5, 6, 7) and operand in (5, 6):
+                reads += 'BC'[operand - 5]
+            if opcode in (2, 5, 6, 7) and operand == 7:
+                return None
+            if not set(reads) <= assigned:
+                return None  # depends on the previous pass
+            assigned |= {2: {'B'}, 6: {'B'}, 7: {'C'}}.get(opcode, set())
+        one_pass = Program([n for instruction in body for n in instruction]).compiled
+        return lambda A: one_pass(A)[0]
+
+    @staticmethod
+    def solve_digits(target: Sequence[int], step: Callable[[int], int]) -> int:
+        '''Lowest A whose output is target, given that output i is step(A >> 3*i).
+        Pick A's bits 3 at a time, from the last output's down; each choice only has to
+        match one digit, so a bad choice is dropped after one evaluation, not a whole run.'''
+
+        def search(i: int, high: int) -> int|None:
+            if i < 0:
+                return high
+            for a in range(high << 3, (high << 3) + 8):
+                if a == 0 and i != 0:
+                    continue  # the loop would stop before the rest of the output
+                if step(a) == target[i] and (found := search(i - 1, a)) is not None:
+                    return found
+            return None
+
+        found = search(len(target) - 1, 0)
+        if found is None:
+            raise ValueError('No value of A outputs the target')
+        return found
+
     def find_a(self, target: tuple[int, ...]) -> Iterator[int]:
         '''Recursively find the lowest A that produces the program sequence.'''
         if target == ():    # base case
             yield 0         # start with 0 because ...
             return          # it's just a value to which we add more bits
         for a_bits_so_far in self.find_a(target[1:]):   # effectively backtrack when lowest ...
-            for a_bits_new in range(8):                 # value can't produce later digits
-                a_cand = (a_bits_so_far << 3) + a_bits_new
-                if self.run_a(a_cand) == target:
+            a_cands = range(a_bits_so_far << 3, (a_bits_so_far << 3) + 8)  # value can't produce later digits
+            for a_cand, output in zip(a_cands, self.run_many(a_cands)):
+                if output == target:
                     yield a_cand
 
     def next_state_output(self, state: State) -> tuple[State, int|None]:
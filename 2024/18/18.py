@@ -5,11 +5,13 @@ https://adventofcode.com/2024/day/18
 Day 18: RAM Run
 """
 
+from array import array
 from collections.abc import Sequence
 #from time import time
 
 import sys; import os; sys.path.append(os.path.abspath('../../util'))
-from Grid import Grid_Sparse, Point
+from Grid import GridBFS, Grid_Sparse, Point, neighbor_table
+from Util import DisjointSet
 
 def main():
     ex_data = get_input('./example.txt')
@@ -34,14 +36,88 @@ def part_1(data: Sequence[Point], max: int = 70, bytes: int = 1024) -> int:
                                          dimensions=(max+1, max+1))
     return len(grid.bfs((0, 0), (max, max))) - 1
 
-def part_2(data: Sequence[Point], max: int = 70, known_good: int = 1024) -> str:
+def part_2(data: Sequence[Point], max: int = 70, known_good: int = 1024, method: str = 'union_find') -> str:
     '''What are the coordinates of the first byte that will
     prevent the exit from being reachable from your starting position?'''
+    match method:
+        case 'union_find':
+            point = first_blocker_union_find(data, max)
+        case 'binary_search':
+            point = first_blocker_binary_search(data, max, known_good)
+        case 'linear':
+            point = first_blocker_linear(data, max, known_good)
+        case _:
+            raise ValueError(f'Unknown method: {method}')
+    return f'{point.col},{point.row}'
+
+def drop_times(data: Sequence[Point], size: int) -> array[int]:
+    '''For each flat index (row*size + col), how many bytes have fallen before it's corrupted,
+    or len(data) if it never is.'''
+    times = array('l', [len(data)]) * (size * size)
+    for t in range(len(data) - 1, -1, -1):
+        times[data[t].row * size + data[t].col] = t
+    return times
+
+def first_blocker_union_find(data: Sequence[Point], max: int = 70) -> Point:
+    '''Run time backwards: start with every byte fallen, and take them away last first,
+    joining each freed cell to its free neighbors, until start and end are connected.
+    The byte that connected them was the first to block the way.
+    O(bytes + grid) near enough, with no searches at all.'''
+    size = max + 1
+    times = drop_times(data, size)
+    table = neighbor_table(size, size)
+    end = size * size - 1
+    cells = DisjointSet(size * size)
+    for i in range(size * size):
+        if times[i] == len(data):
+            for neighbor in table[i*4 : i*4+2]:  # N and E; S and W are joined from the other side
+                if neighbor >= 0 and times[neighbor] == len(data):
+                    cells.union(i, neighbor)
+    if cells.connected(0, end):
+        raise RuntimeError('Path is not blocked')
+    for t in range(len(data) - 1, -1, -1):
+        i = data[t].row * size + data[t].col
+        if times[i] != t:  # Fell on a byte that's still there
+            continue
+        for neighbor in table[i*4 : i*4+4]:
+            if neighbor >= 0 and times[neighbor] >= t:
+                cells.union(i, neighbor)
+        if cells.connected(0, end):
+            return data[t]
+    raise RuntimeError('Start or end is never free')
+
+def first_blocker_binary_search(data: Sequence[Point], max: int = 70, known_good: int = 1024) -> Point:
+    '''Binary search for how many bytes it takes to block the way, checking each guess with a BFS.
+    Every BFS reuses the same arrays (see GridBFS), so none of them allocates or clears anything.'''
+    size = max + 1
+    times = drop_times(data, size)
+    searcher = GridBFS(size, size)
+    end = size * size - 1
+
+    def reachable(fallen: int) -> bool:
+        '''Is end reachable from start after fallen bytes?'''
+        # A cell is corrupted if its drop time is in range(fallen)
+        return times[0] >= fallen and searcher.search((0,), times, range(fallen), targets=(end,)) == end
+
+    lo, hi = known_good, len(data)  # reachable after lo bytes; unknown after hi
+    if not reachable(lo):
+        lo = 0
+    if reachable(hi):
+        raise RuntimeError('Path is not blocked')
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if reachable(mid):
+            lo = mid
+        else:
+            hi = mid
+    return data[hi - 1]
+
+def first_blocker_linear(data: Sequence[Point], max: int = 70, known_good: int = 1024) -> Point:
+    '''Drop bytes one at a time, searching again whenever one lands on the current path.'''
     #t_start = time()
     grid: Grid_Sparse[str] = Grid_Sparse({point: '#' for point in data[:known_good]},
                                          dimensions=(max+1, max+1))
     path: set[Point] = set(grid.bfs(start:=(0, 0), end:=(max, max)))
-    # TODO: Try binary search instead of linear
     for point in data[known_good:]:
         grid[point] = '#'
         if point not in path:  # can't be the blocker
@@ -49,11 +125,10 @@ def part_2(data: Sequence[Point], max: int = 70, known_good: int = 1024) -> str:
         path = set(grid.bfs(start, end))
         if not path:
             #t_end = time(); print(t_end - t_start)
-            return f'{point.col},{point.row}'
+            return point
     else:  # Dropped all points and still have a path
         raise RuntimeError('Path is not blocked')
 
-
 if __name__ == '__main__':
     import sys
     sys.exit(main())
@@ -5,6 +5,7 @@ https://adventofcode.com/2024/day/19
 Day 19: Linen Layout
 """
 
+from concurrent.futures import ProcessPoolExecutor
 from functools import cache
 
 def main():
@@ -23,9 +24,63 @@ def get_input(file='./input.txt') -> tuple[tuple, tuple]:
     designs = designs.splitlines()
     return tuple(patterns), tuple(designs)
 
-def part_1(data) -> int:
+def part_1(data, workers: int = 1) -> int:
     '''How many designs are possible?'''
     patterns, designs = data
+    return sum(1 for n in Towels(patterns).all_ways(designs, workers) if n)
+
+def part_2(data, workers: int = 1) -> int:
+    '''Add up the number of different ways you could make each design'''
+    patterns, designs = data
+    return sum(Towels(patterns).all_ways(designs, workers))
+
+
+class Towels:
+    '''The towel patterns in a trie, to count the ways to make designs out of them'''
+
+    def __init__(self, patterns: tuple[str, ...]) -> None:
+        # Trie nodes: children by next stripe color, and whether a pattern ends here
+        self.children: list[dict[str, int]] = [{}]
+        self.ends: list[bool] = [False]
+        for pattern in patterns:
+            node = 0
+            for color in pattern:
+                if color not in self.children[node]:
+                    self.children[node][color] = len(self.children)
+                    self.children.append({})
+                    self.ends.append(False)
+                node = self.children[node][color]
+            self.ends[node] = True
+
+    def ways(self, design: str) -> int:
+        '''How many ways to make design (0 if impossible)? Forward over positions:
+        from each position it can be made up to, follow the trie to where patterns end.'''
+        children, ends = self.children, self.ends
+        n = len(design)
+        ways_to = [0] * (n + 1)
+        ways_to[0] = 1
+        for start in range(n):
+            if not (here := ways_to[start]):
+                continue
+            node = 0
+            for i in range(start, n):
+                if (node := children[node].get(design[i], 0)) == 0:
+                    break
+                if ends[node]:
+                    ways_to[i + 1] += here
+        return ways_to[n]
+
+    def all_ways(self, designs: tuple[str, ...], workers: int = 1) -> list[int]:
+        '''ways() for each design, in a process pool if workers > 1'''
+        if workers > 1:
+            with ProcessPoolExecutor(workers) as pool:
+                return list(pool.map(self.ways, designs, chunksize=max(1, len(designs) // (4 * workers))))
+        return [self.ways(design) for design in designs]
+
+
+def part_1_startswith(data) -> int:
+    '''part_1, the first way: try every pattern at every point'''
+    patterns, designs = data
     patterns = sorted(patterns, key=len, reverse=True)  # Try from longest to shortest
 
     @cache
@@ -38,8 +93,8 @@ def part_1(data) -> int:
 
     return sum(1 for design in designs if match(design))
 
-def part_2(data) -> int:
-    '''Add up the number of different ways you could make each design'''
+def part_2_startswith(data) -> int:
+    '''part_2, the first way: try every pattern at every point'''
     patterns, designs = data
 
     @cache
@@ -5,7 +5,10 @@ https://adventofcode.com/2024/day/4
 Day 4: Ceres Search
 """
 
-from typing import NamedTuple
+import sys
+import os
+sys.path.append(os.path.abspath('../../util'))
+from Display import style
 
 def main():
     ex_data = get_input('./example.txt')
@@ -86,51 +89,10 @@ def vector_sum(a, b):
 
 
 def display(data, highlight=None):
-    if highlight is None: highlight = []
-    for row, letters in enumerate(data):
-        for col, letter in enumerate(letters):
-            if (row, col) in highlight:
-                print(style.BG.RED, style.FG.GREEN, style.BOLD, sep='', end='')
-            print(data[row][col], style.RESET, sep='', end='')
-        print()
-    
-class _fg(NamedTuple):
-    BLACK =   '\x1b[30m'
-    RED =     '\x1b[31m'
-    GREEN =   '\x1b[32m'
-    YELLOW =  '\x1b[33m'
-    BLUE =    '\x1b[34m'
-    MAGENTA = '\x1b[35m'
-    CYAN =    '\x1b[36m'
-    WHITE =   '\x1b[37m'
-
-class _bg(NamedTuple):
-    BLACK =   '\x1b[40m'
-    RED =     '\x1b[41m'
-    GREEN =   '\x1b[42m'
-    YELLOW =  '\x1b[43m'
-    BLUE =    '\x1b[44m'
-    MAGENTA = '\x1b[45m'
-    CYAN =    '\x1b[46m'
-    WHITE =   '\x1b[47m'
-
-class style(NamedTuple):
-    RESET =         '\x1b[0m'
-    BOLD =          '\x1b[1m'
-    FAINT =         '\x1b[2m'
-    ITALIC =        '\x1b[3m'
-    UNDERLINED =    '\x1b[4m'
-    INVERSE =       '\x1b[7m'
-    STRIKETHROUGH = '\x1b[9m'
-    FG = _fg
-    BG = _bg
-
-class control(NamedTuple):
-    SHOW_CURSOR = '\x1b[?25h'
-    HIDE_CURSOR = '\x1b[?25l'
-    ERASE_CURSOR_TO_END = '\x1b[0J'
-    ERASE_CURSOR_TO_START = '\x1b[1J'
-    ERASE_SCREEN = '\x1b[2J'
+    highlight = set(highlight or ())
+    print('\n'.join(''.join((style.BG.RED + style.FG.GREEN + style.BOLD if (row, col) in highlight else '')
+                             + letter + style.RESET for col, letter in enumerate(letters))
+                    for row, letters in enumerate(data)))
 
 
 if __name__ == '__main__':
@@ -6,12 +6,20 @@ Day 6: Guard Gallivant
 """
 
 from __future__ import annotations
+from bisect import bisect_left, bisect_right, insort
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 import enum
+from itertools import repeat
 import os
 from time import sleep
 from typing import NamedTuple, Sequence
 
+import sys
+sys.path.append(os.path.abspath('../../util'))
+from Display import Renderer, style
+from Grid import Grid_Directions
+
 
 def main():
     ex_data = get_input('./example.txt')
@@ -40,24 +48,67 @@ def part_1(data: dict[Point, str]) -> int:
     return len(visited(data))
 
 def visited(data: dict[Point, str]) -> list[Point]:
-    visited: list[Point] = []
+    visited: dict[Point, None] = {}  # An ordered set
     guard = find_guard(data)
     while guard.loc in data:
         if guard.loc not in visited:
-            visited.append(guard.loc)
+            visited[guard.loc] = None
         if guard.ahead() not in data:
             # About to leave the grid
             break
         while data[guard.ahead()] == '#':
             guard.turn()
         guard.advance()
-    return visited
+    return list(visited)
+
+type Turns = dict[tuple[Point, Velocity], int]
+
+def walk(data: dict[Point, str]) -> tuple[list[Guard], Turns]:
+    '''The guard's state at each step of the unobstructed walk (after turning, about to move),
+    and each turn it takes: (place, direction before turning) -> step.'''
+    steps: list[Guard] = []
+    turns: Turns = {}
+    guard = find_guard(data)
+    while guard.loc in data:
+        if guard.ahead() not in data:
+            steps.append(Guard(guard.loc, guard.vel))
+            break
+        while data[guard.ahead()] == '#':
+            turns[(guard.loc, guard.vel)] = len(steps)
+            guard.turn()
+        steps.append(Guard(guard.loc, guard.vel))
+        guard.advance()
+    return steps, turns
 
-def part_2(data: dict[Point, str], watch: bool = False):
+def part_2(data: dict[Point, str], watch: bool = False, workers: int = 1):
     '''You need to get the guard stuck in a loop by adding a single new obstruction.
     How many different positions could you choose for this obstruction?'''
     # There's an analytical solution, but this works ...
-    return sum(guard_loops(data, obstruction, watch=watch, delay=0.01) for obstruction in visited(data)[1:])
+    if watch:
+        rows, cols = max(data)
+        seen = Grid_Directions(rows + 1, cols + 1)  # Reused by every run
+        return sum(guard_loops(data, obstruction, watch=watch, delay=0.01, seen=seen)
+                   for obstruction in visited(data)[1:])
+    # The walk up to an obstruction is the same as without it, so each check starts
+    # from the step just before the guard first reaches it, and knows the turns so far.
+    steps, turns = walk(data)
+    first_step: dict[Point, int] = {}
+    for n, guard in enumerate(steps):
+        first_step.setdefault(guard.loc, n)
+    candidates = [(loc, n) for loc, n in first_step.items() if n > 0]
+    obstacles = Obstacles.from_grid(data)
+    if workers <= 1:
+        return count_loops(obstacles, steps, turns, candidates)
+    chunks = [candidates[i::workers * 4] for i in range(workers * 4)]
+    with ProcessPoolExecutor(workers) as pool:
+        return sum(pool.map(count_loops, repeat(obstacles), repeat(steps), repeat(turns), chunks))
+
+def count_loops(obstacles: Obstacles, steps: list[Guard], turns: Turns,
+                candidates: list[tuple[Point, int]]) -> int:
+    '''How many of the candidates, (obstruction, step where the guard first reaches it),
+    make the guard loop?'''
+    return sum(obstacles.with_obstruction(loc).loops(steps[n - 1], turns, n - 1)
+               for loc, n in candidates)
 
 def find_guard(data: dict[Point, str]) -> Guard:
     '''Look through the grid for the starting location and direction of the guard'''
@@ -68,39 +119,106 @@ def find_guard(data: dict[Point, str]) -> Guard:
         raise ValueError('No guard, no guard, lala lala la la!')
 
 def guard_loops(data: dict[Point, str], obstruction: Point,
-               watch: bool = False, delay: float = 0.05, inter_delay: float = 0
-               ) -> bool:
+               watch: bool = False, delay: float = 0.05, inter_delay: float = 0,
+               seen: Grid_Directions|None = None) -> bool:
     guard = find_guard(data)
     if obstruction == guard.loc or data[obstruction] == '#':
         return False
-    visited: dict[Point, Direction] = {loc: Direction(0) for loc in data}
+    if seen is None:
+        rows, cols = max(data)
+        seen = Grid_Directions(rows + 1, cols + 1)
+    else:
+        seen.reset()
 
     if watch:
-        display = Display(data)
+        display = Display(data, delay=delay)
         display.highlight = [guard.loc]
         display.obstruction = obstruction
         sleep(inter_delay)
     else:
         display = None
 
+    looped = False
     while guard.loc in data:
         # Refresh display every cycle
         if display:
-            display.print(visited, guard)
-            sleep(delay)
-        # Have we looped?
-        if guard.dir in visited[guard.loc]:
-            if watch: print('LOOP!')
-            return True
-        # Record passing this location in this direction
-        visited[guard.loc] |= guard.dir
+            display.print(seen, guard)
+        # Record passing this location in this direction, unless we already have: we've looped
+        if not seen.add(seen.flat_index(*guard.loc), guard.dir.value):
+            looped = True
+            break
         if guard.ahead() not in data:
             # About to leave grid
             break
         while data[guard.ahead()] == '#' or guard.ahead() == obstruction:
             guard.turn()
         guard.advance()
-    return False
+    if display:
+        display.close()
+        if looped and display.renderer.enabled: print('LOOP!')
+    return looped
+
+
+@dataclass
+class Obstacles:
+    '''The obstacles in each row and column, sorted, so the guard can jump straight
+    to the next turn instead of walking there one step at a time.'''
+    in_row: dict[int, list[int]]  # row -> columns of obstacles
+    in_col: dict[int, list[int]]  # column -> rows of obstacles
+
+    @classmethod
+    def from_grid(cls, data: dict[Point, str]) -> Obstacles:
+        in_row: dict[int, list[int]] = {}
+        in_col: dict[int, list[int]] = {}
+        for loc in sorted(loc for loc, char in data.items() if char == '#'):
+            in_row.setdefault(loc.r, []).append(loc.c)
+            in_col.setdefault(loc.c, []).append(loc.r)
+        for line in in_col.values():
+            line.sort()
+        return cls(in_row, in_col)
+
+    def with_obstruction(self, loc: Point) -> Obstacles:
+        '''A copy with one more obstacle. Only its row and column are copied and patched.'''
+        in_row, in_col = self.in_row.copy(), self.in_col.copy()
+        in_row[loc.r] = in_row.get(loc.r, []).copy()
+        in_col[loc.c] = in_col.get(loc.c, []).copy()
+        insort(in_row[loc.r], loc.c)
+        insort(in_col[loc.c], loc.r)
+        return Obstacles(in_row, in_col)
+
+    def stop(self, loc: Point, vel: Velocity) -> Point|None:
+        '''Where a guard heading from loc with vel stops, just before the next obstacle.
+        None if there's no obstacle, so the guard walks off the grid.'''
+        if vel.dr == 0:
+            line, here = self.in_row.get(loc.r, []), loc.c
+        else:
+            line, here = self.in_col.get(loc.c, []), loc.r
+        if vel.dr + vel.dc > 0:
+            i = bisect_right(line, here)
+            if i == len(line):
+                return None
+            there = line[i] - 1
+        else:
+            i = bisect_left(line, here)
+            if i == 0:
+                return None
+            there = line[i - 1] + 1
+        return Point(loc.r, there) if vel.dr == 0 else Point(there, loc.c)
+
+    def loops(self, guard: Guard, history: Turns|None = None, step: int = 0) -> bool:
+        '''Does the guard loop forever? Checked at turns only, since a loop
+        has to repeat a turn: same place, same direction.
+        history has turns already taken by the step they were taken,
+        if the guard's walk is being resumed at step.'''
+        loc, vel = guard.loc, guard.vel
+        history = history or {}
+        turns: set[tuple[Point, Velocity]] = set()
+        while (loc := self.stop(loc, vel)) is not None:
+            if (loc, vel) in turns or history.get((loc, vel), step) < step:
+                return True
+            turns.add((loc, vel))
+            vel = vel.turned()
+        return False
 
 
 class classproperty:
@@ -214,88 +332,30 @@ class Guard:
 
 
 class Display:
-    def __init__(self, grid) -> None:
+    def __init__(self, grid, delay: float = 0.05, drop: bool = False) -> None:
         self.grid: dict[Point, str] = grid
         self.rows: int = sum(p[1] == 0 for p in self.grid)
         self.cols: int = sum(p[0] == 0 for p in self.grid)
         self.highlight: Sequence[Point] = []
         self.obstruction: Point|None = None
-        term = os.get_terminal_size()
-        if self.rows >= term.lines:
-            print(f'Warning: grid len {self.rows} too tall for terminal {term.columns=} {term.lines=}')
-        self._started: bool = False
-
-    def _prep(self) -> None:
-        print(control.HIDE_CURSOR, end='')
-        print('\n' * (self.rows+1), end='')
-
-    def _back_up(self) -> None:
-        print(f'\x1b[{self.rows}F', end='')
-
-    def print(self, visited, guard) -> None:
-        if not self._started:
-            self._prep()
-            self._started = True
-        self._back_up()
-        for r in range(self.rows):
-            for c in range(self.cols):
-                p = Point(r, c)
-                if p in self.highlight:
-                    print(style.BG.GREEN, end='')
-                if p == guard.loc:
-                    print(style.BOLD, style.FG.YELLOW,
-                        guard.char,
-                        style.RESET,
-                        sep= '', end='')
-                elif p == self.obstruction:
-                    print(style.BOLD, style.FG.RED,
-                        'O',
-                        style.RESET,
-                        sep= '', end='')
-                else:
-                    print(style.BOLD + style.FG.YELLOW if visited[p] else '',
-                        self.grid[p],
-                        style.RESET,
-                        sep= '', end='')
-            print()  # End of row
-
-class _fg(NamedTuple):
-    BLACK =   '\x1b[30m'
-    RED =     '\x1b[31m'
-    GREEN =   '\x1b[32m'
-    YELLOW =  '\x1b[33m'
-    BLUE =    '\x1b[34m'
-    MAGENTA = '\x1b[35m'
-    CYAN =    '\x1b[36m'
-    WHITE =   '\x1b[37m'
-
-class _bg(NamedTuple):
-    BLACK =   '\x1b[40m'
-    RED =     '\x1b[41m'
-    GREEN =   '\x1b[42m'
-    YELLOW =  '\x1b[43m'
-    BLUE =    '\x1b[44m'
-    MAGENTA = '\x1b[45m'
-    CYAN =    '\x1b[46m'
-    WHITE =   '\x1b[47m'
-
-class style(NamedTuple):
-    RESET =         '\x1b[0m'
-    BOLD =          '\x1b[1m'
-    FAINT =         '\x1b[2m'
-    ITALIC =        '\x1b[3m'
-    UNDERLINED =    '\x1b[4m'
-    INVERSE =       '\x1b[7m'
-    STRIKETHROUGH = '\x1b[9m'
-    FG = _fg
-    BG = _bg
-
-class control(NamedTuple):
-    SHOW_CURSOR = '\x1b[?25h'
-    HIDE_CURSOR = '\x1b[?25l'
-    ERASE_CURSOR_TO_END = '\x1b[0J'
-    ERASE_CURSOR_TO_START = '\x1b[1J'
-    ERASE_SCREEN = '\x1b[2J'
+        self.renderer = Renderer(self.rows, self.cols, interval=delay, drop=drop)
+
+    def print(self, seen: Grid_Directions, guard, force: bool = False) -> None:
+        if not (force or self.renderer.due()):
+            return  # Don't bother building a frame that won't be drawn
+        self.renderer.draw([[self.cell(Point(r, c), seen, guard) for c in range(self.cols)]
+                            for r in range(self.rows)], force=force)
+
+    def cell(self, p: Point, seen: Grid_Directions, guard) -> str:
+        highlight = style.BG.GREEN if p in self.highlight else ''
+        if p == guard.loc:
+            return highlight + style.BOLD + style.FG.YELLOW + guard.char
+        elif p == self.obstruction:
+            return highlight + style.BOLD + style.FG.RED + 'O'
+        return highlight + (style.BOLD + style.FG.YELLOW if seen.get(seen.flat_index(*p)) else '') + self.grid[p]
+
+    def close(self) -> None:
+        self.renderer.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,114 @@
+"""
+Content-addressed on-disk cache, for answers and parsed inputs.
+Entries are pickles named by a hash of everything that went into them,
+evicted least-recently-used first once the cache is over its size cap.
+Also keeps the known-good answers for regression checks (the oracle).
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import os
+from pathlib import Path
+import pickle
+import tempfile
+from typing import Any
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / '.cache'
+
+
+def digest(*parts: bytes|str) -> str:
+    '''Hex SHA-256 of parts, kept distinct (('ab', 'c') != ('a', 'bc')).'''
+    h = hashlib.sha256()
+    for part in parts:
+        part = part.encode() if isinstance(part, str) else part
+        h.update(len(part).to_bytes(8, 'little'))
+        h.update(part)
+    return h.hexdigest()
+
+def file_digest(path: Path|str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.file_digest(f, 'sha256').hexdigest()
+
+
+class Cache:
+    '''Directory of pickled values by key, capped at max_bytes.
+    put() doesn't check the cap, since that means a stat of every entry:
+    call evict() once when done writing.'''
+
+    def __init__(self, root: Path|str = CACHE_DIR, max_bytes: int = 256 * 2**20) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def __contains__(self, key: str) -> bool:
+        return self._path(key).exists()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except Exception:  # missing, truncated, or pickled from code that's gone
+            return default
+        os.utime(path)  # mark as recently used
+        return value
+
+    def put(self, key: str, value: Any) -> bool:
+        '''Store value; return False if it can't be pickled.'''
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return False
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so readers in other processes never see half a file
+        with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as f:
+            f.write(data)
+        os.replace(f.name, path)
+        return True
+
+    def evict(self) -> None:
+        '''Remove least recently used entries until under max_bytes.'''
+        if not self.root.exists():
+            return
+        entries = [(entry.stat().st_mtime, entry.stat().st_size, Path(entry.path))
+                   for subdir in self.root.iterdir() if subdir.is_dir()
+                   for entry in os.scandir(subdir) if entry.is_file()]
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self) -> None:
+        if not self.root.exists():
+            return
+        for subdir in self.root.iterdir():
+            if subdir.is_dir():
+                for entry in subdir.iterdir():
+                    entry.unlink()
+
+
+class Oracle:
+    '''Known-good answers by key. A small JSON file, never evicted.'''
+
+    def __init__(self, path: Path|str = CACHE_DIR / 'oracle.json') -> None:
+        self.path = Path(path)
+        try:
+            self.answers: dict[str, str] = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            self.answers = {}
+
+    def get(self, key: str) -> str|None:
+        return self.answers.get(key)
+
+    def record(self, key: str, answer: str) -> None:
+        self.answers[key] = answer
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self.answers, indent=1, sort_keys=True) + '\n')
@@ -0,0 +1,217 @@
+"""
+Find, load, and time each day's solution module (YYYY/D/D.py).
+"""
+
+from __future__ import annotations
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager, redirect_stdout
+from functools import cache
+import importlib.util
+import os
+from pathlib import Path
+import re
+import resource
+import signal
+import sys
+from statistics import median, quantiles
+from time import perf_counter
+from types import ModuleType
+from typing import Any, NamedTuple
+
+from Cache import Cache, digest, file_digest
+
+ROOT = Path(__file__).resolve().parent.parent
+STAGES = ('parse', 'part_1', 'part_2')
+
+
+class Day(NamedTuple):
+    year: int
+    day: int
+
+    def __str__(self) -> str:
+        return f'{self.year}/{self.day}'
+
+    @property
+    def dir(self) -> Path:
+        return ROOT / str(self.year) / str(self.day)
+
+    @property
+    def path(self) -> Path:
+        return self.dir / f'{self.day}.py'
+
+    @classmethod
+    def parse(cls, text: str) -> Day:
+        '''"2024/6" -> Day(2024, 6)'''
+        year, day = text.strip('/').split('/')
+        return cls(int(year), int(day))
+
+
+def discover(selection: Iterable[str] = ()) -> list[Day]:
+    '''All days with a solution file and an input, in order.
+    Optionally limit to a selection like ('2023', '2024/6').'''
+    days = sorted(Day(int(path.parent.parent.name), int(path.parent.name))
+                  for path in ROOT.glob('20[0-9][0-9]/*/*.py')
+                  if path.parent.name.isdigit() and path.stem == path.parent.name
+                  and (path.parent / 'input.txt').exists())
+    selection = [s.strip('/') for s in selection]
+    if not selection:
+        return days
+    return [day for day in days
+            if str(day.year) in selection or str(day) in selection]
+
+@contextmanager
+def working_dir(path: Path|str) -> Iterator[None]:
+    '''Run the block in path, as if the solution had been run from its own directory.'''
+    prev = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(prev)
+
+def load(day: Day) -> ModuleType:
+    '''Import a day's module from its own directory, so its relative paths
+    (../../util, ./input.txt) resolve. Returns the module without running main().'''
+    with working_dir(day.dir):
+        spec = importlib.util.spec_from_file_location(f'day_{day.year}_{day.day}', day.path)
+        assert spec is not None and spec.loader is not None
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = module  # dataclasses look themselves up here
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[spec.name]
+            raise
+    return module
+
+def has_parts(module: ModuleType) -> bool:
+    return all(callable(getattr(module, name, None)) for name in ('get_input', 'part_1', 'part_2'))
+
+def call_quietly(func: Callable[..., Any], *args) -> Any:
+    '''Call func, discarding anything it prints.'''
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        return func(*args)
+
+
+@cache
+def util_digest() -> str:
+    '''Hash of all the util modules, since a day's answer can change when they do.'''
+    return digest(*(file_digest(path) for path in sorted((ROOT / 'util').glob('*.py'))))
+
+def cache_key(day: Day, stage: str) -> str:
+    '''Cache key for a day's stage ('parse', 'part_1', 'part_2'):
+    hash of the solution source, the util modules, and the input.'''
+    return digest(file_digest(day.path), util_digest(), file_digest(day.dir / 'input.txt'), stage)
+
+def oracle_key(day: Day, part: int) -> str:
+    '''Key for a known-good answer: the day, part and input, but not the code.'''
+    return f'{day}/{part}/{file_digest(day.dir / "input.txt")[:16]}'
+
+def noted_answers(day: Day) -> dict[int, str]:
+    '''Answers noted in a day's main(), like
+        print('part 1:', part_1(data))  # 130536
+        print(part_2(data), '= 1235430?')'''
+    answers = {}
+    for line in day.path.read_text().splitlines():
+        if match := (re.search(r"part_([12])\(data\b.*#\s*(\S+)\s*$", line)
+                     or re.search(r"part_([12])\(data\b.*'= ([^?']+)\?'", line)):
+            part, answer = match.groups()
+            answers[int(part)] = answer.replace('_', '') if answer.replace('_', '').isdigit() else answer
+    return answers
+
+
+class Result(NamedTuple):
+    '''Outcome of running one part of one day.'''
+    day: str
+    part: int
+    answer: str
+    seconds: float
+    error: str = ''
+
+_MISSING = object()
+
+def _timed_out(signum, frame):
+    raise TimeoutError
+
+def run_part(day: Day, part: int, timeout: float|None = None, cache: Cache|None = None) -> Result:
+    '''Parse input and run one part, in the day's directory, for up to timeout seconds.
+    With a cache, reuse the parsed input if it was pickled before.
+    Meant to run in a worker process: the timeout is a SIGALRM.'''
+    started = perf_counter()
+    try:
+        module = sys.modules.get(f'day_{day.year}_{day.day}') or load(day)
+        if not has_parts(module):
+            raise AttributeError('no get_input/part_1/part_2')
+        if timeout:
+            signal.signal(signal.SIGALRM, _timed_out)
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        try:
+            with working_dir(day.dir):
+                if cache is None:
+                    data = call_quietly(module.get_input, './input.txt')
+                elif (data := cache.get(key := cache_key(day, 'parse'), _MISSING)) is _MISSING:
+                    data = call_quietly(module.get_input, './input.txt')
+                    cache.put(key, data)
+                answer = call_quietly(getattr(module, f'part_{part}'), data)
+        finally:
+            if timeout:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+    except TimeoutError:
+        return Result(str(day), part, '', perf_counter() - started, f'timed out after {timeout}s')
+    except Exception as e:
+        return Result(str(day), part, '', perf_counter() - started, f'{type(e).__name__}: {e}')
+    return Result(str(day), part, str(answer), perf_counter() - started)
+
+
+class Timing(NamedTuple):
+    '''One row of benchmark results. Times are in seconds; peak RSS is for the whole day.'''
+    day: str
+    stage: str
+    trials: int
+    median: float
+    p95: float
+    min: float
+    peak_rss_kb: int
+    answer: str
+    error: str = ''
+
+def p95(times: list[float]) -> float:
+    if len(times) < 2:
+        return times[0]
+    return quantiles(times, n=20, method='inclusive')[18]
+
+def time_day(day: Day, trials: int = 5, warmup: int = 1, budget: float = 10.0) -> list[Timing]:
+    '''Parse input and run both parts, warmup + trials times, on fresh input each time.
+    Past budget seconds, stop after the first measured trial.
+    Meant to run in a fresh process, so peak RSS is this day's.'''
+    try:
+        module = load(day)
+        if not has_parts(module):
+            raise AttributeError('no get_input/part_1/part_2')
+    except Exception as e:
+        return [Timing(str(day), '', 0, 0, 0, 0, 0, '', f'{type(e).__name__}: {e}')]
+    times: dict[str, list[float]] = {stage: [] for stage in STAGES}
+    answers: dict[str, Any] = {}
+    started = perf_counter()
+    with working_dir(day.dir):
+        for n in range(warmup + trials):
+            over_budget = perf_counter() - started > budget
+            if over_budget and times['parse']:
+                break
+            measured = n >= warmup or over_budget  # skip leftover warmup if slow
+            try:
+                data = None
+                for stage in STAGES:
+                    t = perf_counter()
+                    if stage == 'parse':
+                        data = call_quietly(module.get_input, './input.txt')
+                    else:
+                        answers[stage] = call_quietly(getattr(module, stage), data)
+                    if measured:
+                        times[stage].append(perf_counter() - t)
+            except Exception as e:
+                return [Timing(str(day), stage, 0, 0, 0, 0, 0, '', f'{type(e).__name__}: {e}')]
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return [Timing(str(day), stage, len(ts), median(ts), p95(ts), min(ts),
+                   peak_rss, '' if stage == 'parse' else str(answers[stage]))
+            for stage, ts in times.items()]
@@ -5,7 +5,13 @@ Helpers for fancy printing.
 Should probably just use Rich, Blessings, ncurses, notcurses, ....
 """
 
-from typing import NamedTuple
+from __future__ import annotations
+import atexit
+from collections.abc import Sequence
+import shutil
+import sys
+from time import perf_counter, sleep
+from typing import NamedTuple, TextIO
 
 class _fg(NamedTuple):
     BLACK =   '\x1b[30m'
@@ -44,6 +50,86 @@ class control(NamedTuple):
     ERASE_CURSOR_TO_END = '\x1b[0J'
     ERASE_CURSOR_TO_START = '\x1b[1J'
     ERASE_SCREEN = '\x1b[2J'
+    ERASE_TO_END_OF_LINE = '\x1b[0K'
+    SAVE_CURSOR = '\x1b7'
+    RESTORE_CURSOR = '\x1b8'
+
+
+class Renderer:
+    '''
+    Draws frames of a grid in place, for animations.
+    A frame is rows of cells, each cell a string: one character, maybe with style codes.
+    Only cells that changed since the last drawn frame are redrawn, all in one write.
+    Frames are at least interval seconds apart: early frames are dropped if drop,
+    else the renderer sleeps until it's time. Does nothing if file isn't a terminal.
+    '''
+
+    def __init__(self, rows: int, cols: int, interval: float = 1/30, drop: bool = True,
+                 file: TextIO = sys.stdout) -> None:
+        self.rows = rows
+        self.cols = cols
+        self.interval = interval
+        self.drop = drop
+        self.file = file
+        self.enabled: bool = file.isatty()
+        self._prev: list[list[str]]|None = None
+        self._next_time: float = 0
+        if self.enabled:
+            term = shutil.get_terminal_size()
+            if rows >= term.lines:
+                print(f'Warning: grid len {rows} too tall for terminal {term.columns=} {term.lines=}',
+                      file=file)
+
+    def due(self) -> bool:
+        '''Would a frame be drawn now? Check first, to skip building frames that would be dropped.'''
+        return self.enabled and (not self.drop or perf_counter() >= self._next_time)
+
+    def draw(self, frame: Sequence[Sequence[str]], status: str = '', force: bool = False) -> bool:
+        '''Draw frame (and a status line under it), if it's due or force. Return whether drawn.'''
+        if not self.enabled or not (force or self.due()):
+            return False
+        if not self.drop and (wait := self._next_time - perf_counter()) > 0:
+            sleep(wait)
+        out: list[str] = []
+        if self._prev is None:
+            # Make room, then remember where the grid starts
+            _hid_cursor.add(self.file)
+            out += [control.HIDE_CURSOR, '\n' * (self.rows + 1), f'\x1b[{self.rows + 1}F', control.SAVE_CURSOR]
+            self._prev = [[''] * self.cols for _ in range(self.rows)]
+        for r, (row, prev) in enumerate(zip(frame, self._prev)):
+            c = 0
+            while c < len(row):
+                if row[c] == prev[c]:
+                    c += 1
+                    continue
+                start = c
+                while c < len(row) and row[c] != prev[c]:
+                    c += 1
+                out.append(control.RESTORE_CURSOR + (f'\x1b[{r}B' if r else '') + (f'\x1b[{start}C' if start else ''))
+                out += [cell + style.RESET for cell in row[start:c]]
+                prev[start:c] = row[start:c]
+        out.append(f'{control.RESTORE_CURSOR}\x1b[{self.rows}B\r{status}{control.ERASE_TO_END_OF_LINE}')
+        self.file.write(''.join(out))
+        self.file.flush()
+        self._next_time = perf_counter() + self.interval
+        return True
+
+    def close(self) -> None:
+        '''Leave the cursor below the last frame, and show it again.'''
+        if self.enabled and self._prev is not None:
+            self.file.write(f'{control.RESTORE_CURSOR}\x1b[{self.rows + 1}B\r{control.SHOW_CURSOR}')
+            self.file.flush()
+            self._prev = None
+            _hid_cursor.discard(self.file)
+
+_hid_cursor: set[TextIO] = set()
+
+@atexit.register
+def _show_cursor() -> None:
+    '''Show the cursor again at exit, even if a Renderer wasn't closed.'''
+    for file in _hid_cursor:
+        file.write(control.SHOW_CURSOR)
+        file.flush()
 
 
 if __name__ == '__main__':
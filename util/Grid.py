@@ -4,11 +4,18 @@ Classes & functions for representing and working with a 2D grid.
 
 from __future__ import annotations
 from abc import ABC
-from collections.abc import Callable, Collection, Generator, Iterable, Mapping, Sequence
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Callable, Collection, Generator, Iterable, Iterator, Mapping, Sequence
+from copy import copy
 import enum
-from functools import singledispatchmethod
+from functools import cache, singledispatchmethod
 import itertools
-from typing import NamedTuple, overload
+from math import hypot
+from operator import add
+from typing import Any, NamedTuple, overload
+
+from Util import DisjointSet
 
 
 class _classproperty:
@@ -221,6 +228,312 @@ class Velocity(RCPair):
         return self.dr * other.dc - self.dc * other.dr
 
 type RowAndCol = RCPair | tuple[int, int]
+type Steps = tuple[tuple[int, int], ...]
+
+STEPS_4: Steps = ((-1, 0), (0, 1), (1, 0), (0, -1))  # N, E, S, W
+STEPS_8: Steps = ((-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1))
+
+def taxi_steps(radius: int) -> Steps:
+    '''All (row, col) offsets within taxicab distance radius, excluding (0, 0).'''
+    return tuple((dr, dc) for dr in range(-radius, radius+1)
+                 for dc in range(abs(dr)-radius, radius-abs(dr)+1) if dr or dc)
+
+def _steps(connectivity: int|Steps) -> Steps:
+    match connectivity:
+        case 4: return STEPS_4
+        case 8: return STEPS_8
+        case tuple(): return connectivity
+    raise ValueError(f'Unknown connectivity: {connectivity}')
+
+def neighbor_table(height: int, width: int, connectivity: int|Steps = 4) -> array[int]:
+    '''Adjacency table for a height x width grid, in flat indices (row*width + col).
+    table[i*k + j] is the neighbor of cell i by the j-th of k steps, or -1 if out of bounds.
+    connectivity is 4, 8, or a tuple of (row, col) steps, e.g. taxi_steps(radius).
+    4- and 8-connected tables are cached, so grids of the same size share one;
+    tables of other steps can be huge, so they're built each time.'''
+    if isinstance(connectivity, int):
+        return _cached_neighbor_table(height, width, connectivity)
+    return _neighbor_table(height, width, _steps(connectivity))
+
+@cache
+def _cached_neighbor_table(height: int, width: int, connectivity: int) -> array[int]:
+    return _neighbor_table(height, width, _steps(connectivity))
+
+def _neighbor_table(height: int, width: int, steps: Steps) -> array[int]:
+    table = array('l', [-1]) * (height * width * len(steps))
+    for j, (dr, dc) in enumerate(steps):
+        # Each step is valid for a rectangle of cells; fill it row by row.
+        cols = range(max(0, -dc), min(width, width - dc))
+        for r in range(max(0, -dr), min(height, height - dr)):
+            first = r * width + cols.start
+            table[first*len(steps) + j : (first+len(cols))*len(steps) : len(steps)] = \
+                array('l', range(first + dr*width + dc, first + dr*width + dc + len(cols)))
+    return table
+
+_METRICS: dict[str, Callable[[int, int], float]] = {
+    'taxi': lambda dr, dc: abs(dr) + abs(dc),
+    'chebyshev': lambda dr, dc: max(abs(dr), abs(dc)),
+    'euclidean': hypot,
+}
+
+class Stencil(NamedTuple):
+    '''(row, col) offsets within a radius, from stencil(), grouped by row.
+    rows[k] is (dr, dcs, distances) for dr = k - radius, with dcs ascending,
+    so clipping a stencil to a grid is a slice of rows, and a slice of each row.
+    nearest_first has the same offsets as (dr, dc, distance), sorted by distance.'''
+    radius: int
+    rows: tuple[tuple[int, tuple[int, ...], tuple[float, ...]], ...]
+    nearest_first: tuple[tuple[int, int, float], ...]
+
+    def offsets(self) -> Generator[tuple[int, int, float]]:
+        '''(dr, dc, distance) of every offset, in reading order.'''
+        for dr, dcs, distances in self.rows:
+            yield from zip(itertools.repeat(dr), dcs, distances)
+
+    def flat_offsets(self, width: int) -> tuple[list[int], list[float]]:
+        '''Flat index offsets (dr*width + dc) and their distances.
+        Only valid where no offset wraps past the edge of a row, e.g. on a grid padded by radius.'''
+        return [dr*width + dc for dr, dc, _ in self.offsets()], [d for _, _, d in self.offsets()]
+
+    def around(self, row: int, col: int, height: int, width: int) -> Generator[tuple[int, float]]:
+        '''(flat index, distance) of every offset from (row, col) inside a height x width grid.'''
+        radius = self.radius
+        for dr, dcs, distances in self.rows[max(0, radius - row) : radius + height - row]:
+            lo = bisect_left(dcs, -col)
+            hi = bisect_right(dcs, width - 1 - col)
+            yield from zip(map(add, dcs[lo:hi], itertools.repeat((row + dr)*width + col)), distances[lo:hi])
+
+@cache
+def stencil(radius: int, metric: str = 'taxi', min_distance: float = 1) -> Stencil:
+    '''Offsets at distance min_distance to radius (inclusive) by metric: 'taxi', 'chebyshev' or 'euclidean'.
+    Distances are ints, except for euclidean. Cached, so every query of the same shape shares one.'''
+    try:
+        distance = _METRICS[metric]
+    except KeyError:
+        raise ValueError(f'Unknown metric: {metric}') from None
+    rows = []
+    for dr in range(-radius, radius+1):
+        row = [(dc, d) for dc in range(-radius, radius+1) if min_distance <= (d := distance(dr, dc)) <= radius]
+        rows.append((dr, tuple(dc for dc, _ in row), tuple(d for _, d in row)))
+    nearest_first = sorted(((dr, dc, d) for dr, dcs, ds in rows for dc, d in zip(dcs, ds)),
+                           key=lambda offset: offset[2])
+    return Stencil(radius, tuple(rows), tuple(nearest_first))
+
+class GridBFS:
+    '''Breadth-first search on the flat indices of a height x width grid, reusing its arrays for every search.
+    Each search stamps the cells it reaches with its own generation number, so nothing is ever cleared:
+    dist and parent are only meaningful for cells reached by the latest search (see reached()).
+    A cell is passable unless cells[i] in invalid, for any flat sequence of values
+    (or anything indexable by flat index, like a _FlatView).'''
+
+    def __init__(self, height: int, width: int, connectivity: int|Steps = 4) -> None:
+        self.height = height
+        self.width = width
+        self.table = neighbor_table(height, width, connectivity)
+        self.k = len(_steps(connectivity))
+        self.generation = 0
+        self.seen = array('l', [0]) * (height * width)
+        self.dist = array('l', [0]) * (height * width)
+        self.parent = array('l', [-1]) * (height * width)
+        self.order: list[int] = []  # Cells reached by the latest search, nearest first
+        # The far side of a bidirectional search, made on its first use
+        self.seen_back: array[int]|None = None
+        self.dist_back: array[int]|None = None
+        self.parent_back: array[int]|None = None
+
+    def search(self, starts: Iterable[int], cells: Any = (), invalid: Collection[Any] = (),
+               targets: Collection[int] = (), all_targets: bool = False) -> int:
+        '''Search outward from all of starts at once.
+        With no targets, reach every reachable cell: all distances.
+        With targets, stop at the first one reached (or once all are reached, with all_targets).
+        Returns the last target reached, or -1.'''
+        self.generation += 1
+        generation = self.generation
+        seen, dist, parent, table, k = self.seen, self.dist, self.parent, self.table, self.k
+        remaining = len(targets) if all_targets else min(len(targets), 1)
+        found = -1
+        todo = self.order
+        todo.clear()
+        for start in starts:
+            if seen[start] == generation:
+                continue
+            seen[start], dist[start], parent[start] = generation, 0, -1
+            todo.append(start)
+            if start in targets:
+                found = start
+                remaining -= 1
+        if targets and remaining <= 0:
+            return found
+        for here in todo:
+            d = dist[here] + 1
+            for neighbor in table[here*k : here*k+k]:
+                if neighbor < 0 or seen[neighbor] == generation or cells[neighbor] in invalid:
+                    continue
+                seen[neighbor], dist[neighbor], parent[neighbor] = generation, d, here
+                todo.append(neighbor)
+                if neighbor in targets:
+                    found = neighbor
+                    remaining -= 1
+                    if remaining == 0:
+                        return found
+        return found
+
+    def reached(self, i: int) -> bool:
+        '''Did the latest search reach cell i?'''
+        return self.seen[i] == self.generation
+
+    def distance(self, i: int) -> int:
+        '''Steps from the nearest start to cell i in the latest search, or -1 if not reached.'''
+        return self.dist[i] if self.seen[i] == self.generation else -1
+
+    def distances(self) -> dict[int, int]:
+        '''Steps to every cell the latest search reached.'''
+        dist = self.dist
+        return {i: dist[i] for i in self.order}
+
+    def path(self, end: int) -> list[int]:
+        '''Path from the nearest start to end in the latest search; empty if not reached.'''
+        if self.seen[end] != self.generation:
+            return []
+        parent = self.parent
+        path = [end]
+        while (here := parent[path[-1]]) != -1:
+            path.append(here)
+        return path[::-1]
+
+    def bidirectional(self, start: int, end: int, cells: Any = (), invalid: Collection[Any] = ()) -> list[int]:
+        '''Shortest path from start to end, searching from both ends a whole level at a time,
+        always from the smaller frontier, until they meet. Empty if there's no path.'''
+        if self.seen_back is None:
+            self.seen_back = array('l', [0]) * (self.height * self.width)
+            self.dist_back = array('l', [0]) * (self.height * self.width)
+            self.parent_back = array('l', [-1]) * (self.height * self.width)
+        self.generation += 1
+        generation = self.generation
+        table, k = self.table, self.k
+        sides = [(self.seen, self.dist, self.parent), (self.seen_back, self.dist_back, self.parent_back)]
+        fronts: list[list[int]] = [[start], [end]]
+        for (seen, dist, parent), (first,) in zip(sides, fronts):
+            seen[first], dist[first], parent[first] = generation, 0, -1
+        if start == end:
+            return [start]
+        if cells[end] in invalid:  # Like search(), which never steps onto an invalid end
+            return []
+        while fronts[0] and fronts[1]:
+            side = 0 if len(fronts[0]) <= len(fronts[1]) else 1
+            (seen, dist, parent), (other_seen, other_dist, _) = sides[side], sides[1 - side]
+            meet, best = -1, -1
+            front = []
+            for here in fronts[side]:
+                d = dist[here] + 1
+                for neighbor in table[here*k : here*k+k]:
+                    if neighbor < 0 or seen[neighbor] == generation or cells[neighbor] in invalid:
+                        continue
+                    seen[neighbor], dist[neighbor], parent[neighbor] = generation, d, here
+                    front.append(neighbor)
+                    if other_seen[neighbor] == generation and (best < 0 or d + other_dist[neighbor] < best):
+                        meet, best = neighbor, d + other_dist[neighbor]
+            if meet >= 0:
+                return self._joined(meet)
+            fronts[side] = front
+        return []
+
+    def _joined(self, meet: int) -> list[int]:
+        '''Path through meet, from the start side's parents and then the end side's.'''
+        path = [meet]
+        while (here := self.parent[path[-1]]) != -1:
+            path.append(here)
+        path.reverse()
+        while (here := self.parent_back[path[-1]]) != -1:  # type: ignore
+            path.append(here)
+        return path
+
+    def copy(self) -> GridBFS:
+        '''The latest search() results, in arrays of their own, safe from later searches.
+        Only what search() writes is copied, not the far side of a bidirectional search.'''
+        other = copy(self)
+        other.order = self.order.copy()
+        other.seen, other.dist, other.parent = array('l', self.seen), array('l', self.dist), array('l', self.parent)
+        other.seen_back = other.dist_back = other.parent_back = None
+        return other
+
+def _own_searcher(grid: Any, height: int, width: int, connectivity: int|Steps) -> GridBFS:
+    '''grid's own GridBFS for its current size, made on first use and kept on the grid.'''
+    searchers: dict[tuple[int, int, int|Steps], GridBFS] = vars(grid).setdefault('_searchers', {})
+    if (key := (height, width, connectivity)) not in searchers:
+        searchers.clear()  # Only the grid's current size is any use
+        searchers[key] = GridBFS(height, width, connectivity)
+    return searchers[key]
+
+class _FlatView:
+    '''Values of a grid that isn't stored flat, by flat index, for GridBFS.'''
+
+    def __init__(self, value: Callable[[int], Any]) -> None:
+        self.value = value
+
+    def __getitem__(self, i: int) -> Any:
+        return self.value(i)
+
+class Regions(NamedTuple):
+    '''Connected regions of a grid, from label_regions().
+    labels maps each flat index to a region number; the lists are indexed by region number.'''
+    labels: array[int]
+    values: list[Any]
+    area: list[int]
+    perimeter: list[int]
+    sides: list[int]
+
+def label_regions(cells: Sequence[Any], height: int, width: int,
+                  key: Callable[[Any], Any]|None = None) -> Regions:
+    '''Label rectilinearly connected regions of equal value (or equal key(value))
+    in a flat row-major grid, with the area, perimeter, and number of sides of each.
+    One union-find scan, plus one scan to number the regions and total them up.'''
+    if key is not None:
+        cells = [key(x) for x in cells]
+    n = height * width
+    regions = DisjointSet(n)
+    union = regions.union
+    perims = bytearray(n)
+    corners = bytearray(n)  # A polygon has as many sides as corners
+    last_row, last_col = height - 1, width - 1
+    i = 0
+    for r in range(height):
+        for c in range(width):
+            v = cells[i]
+            n_ = r > 0 and cells[i-width] == v
+            s_ = r < last_row and cells[i+width] == v
+            w_ = c > 0 and cells[i-1] == v
+            e_ = c < last_col and cells[i+1] == v
+            if n_: union(i, i-width)
+            if w_: union(i, i-1)
+            perims[i] = 4 - n_ - s_ - w_ - e_
+            # Convex corner: both sides differ. Concave: both sides match, diagonal differs.
+            corners[i] = (
+                (not n_ and not w_) + (n_ and w_ and cells[i-width-1] != v)
+                + (not n_ and not e_) + (n_ and e_ and cells[i-width+1] != v)
+                + (not s_ and not w_) + (s_ and w_ and cells[i+width-1] != v)
+                + (not s_ and not e_) + (s_ and e_ and cells[i+width+1] != v)
+            )
+            i += 1
+
+    labels = array('l', [-1]) * n
+    values: list[Any] = []
+    area: list[int] = []
+    perimeter: list[int] = []
+    sides: list[int] = []
+    find = regions.find
+    for i in range(n):
+        root = find(i)
+        if (label := labels[root]) == -1:
+            label = labels[root] = len(values)
+            values.append(cells[i])
+            area.append(0); perimeter.append(0); sides.append(0)
+        labels[i] = label
+        area[label] += 1
+        perimeter[label] += perims[i]
+        sides[label] += corners[i]
+    return Regions(labels, values, area, perimeter, sides)
+
 
 class _Grid[T](Sequence[Sequence[T]], ABC):
     def __init__[T_in](self,
@@ -297,62 +610,86 @@ class _Grid[T](Sequence[Sequence[T]], ABC):
 
     @singledispatchmethod
     def neighbors_in_taxi_radius(self, point: Point|RowAndCol, radius: int) -> Generator[tuple[Point, T]]:
-        point = Point(*point)
-        DIAGS = (Velocity(1, 1), Velocity(1, -1), Velocity(-1, -1), Velocity(-1, 1))
-        for r in range(1, radius+1):
-            neighbor = point + Velocity(-r, 0)  # go north by r
-            for diag in DIAGS:
-                #for _ in range(r):
-                for _ in itertools.repeat(None, r):  # faster!
-                    if self.in_bounds(neighbor):
-                        yield neighbor, self.get_value(neighbor)
-                    neighbor += diag
+        '''(point, value) of every cell within taxicab distance radius, nearest first.'''
+        row, col = point
+        height, width = self.height, self.width
+        for dr, dc, _ in stencil(radius).nearest_first:
+            if 0 <= row + dr < height and 0 <= col + dc < width:
+                neighbor = Point(row + dr, col + dc)
+                yield neighbor, self.get_value(neighbor)
     @neighbors_in_taxi_radius.register
-    def _(self, row: int, col: int):
-        return self.neighbors_in_taxi_radius(Point(row, col))
+    def _(self, row: int, col: int, radius: int):
+        return self.neighbors_in_taxi_radius(Point(row, col), radius)
+
+    def within(self, point: Point|RowAndCol, radius: int, metric: str = 'taxi',
+               min_distance: float = 1) -> Generator[tuple[int, float]]:
+        '''(flat index, distance) of every cell within radius of point; see stencil().'''
+        return stencil(radius, metric, min_distance).around(*point, self.height, self.width)
+
+    def neighbor_table(self, connectivity: int|Steps = 4) -> array[int]:
+        '''Adjacency table in flat indices (row*width + col); see neighbor_table().'''
+        return neighbor_table(self.height, self.width, connectivity)
+
+    def regions(self, key: Callable[[T], Any]|None = None) -> Regions:
+        '''Label all connected regions of equal value (or key(value)); see label_regions().'''
+        return label_regions([x for row in self for x in row], self.height, self.width, key)
 
     @singledispatchmethod
     def contiguous(self, origin: Point|RowAndCol) -> tuple[Point, ...]:
+        width = self.width
+        table = self.neighbor_table()
         value = self.get_value(origin)
-        members = set()
-        stack = [origin]
+        members = {origin[0]*width + origin[1]}
+        stack = list(members)
         while stack:
-            if (point := stack.pop()) in members:
-                continue
-            members.add(point)
-            stack.extend(neigh_pt for neigh_pt, neigh_val in self.neighbors(*point)
-                         if neigh_val == value and neigh_pt not in members)
-        return tuple(sorted(members))
+            here = stack.pop()
+            for neighbor in table[here*4:here*4+4]:
+                if neighbor < 0 or neighbor in members:
+                    continue
+                row, col = divmod(neighbor, width)
+                if self[row][col] == value:
+                    members.add(neighbor)
+                    stack.append(neighbor)
+        return tuple(Point(*divmod(i, width)) for i in sorted(members))
     @contiguous.register
     def _(self, row: int, col:int):
         return self.contiguous(Point(row, col))
     
-    def bfs(self, start: RowAndCol, end: RowAndCol, invalid: Collection[T] = set('#')) -> tuple[Point, ...]:
+    def searcher(self, connectivity: int|Steps = 4) -> GridBFS:
+        '''This grid's reusable breadth-first search on flat indices (row*width + col); see GridBFS.'''
+        return _own_searcher(self, self.height, self.width, connectivity)
+
+    def _bfs_cells(self, invalid: Collection[T]) -> tuple[Any, Collection[Any]]:
+        '''Values by flat index, and invalid values as they'll be found there, for GridBFS.'''
+        width = self.width
+        return _FlatView(lambda i: self[i // width][i % width]), set(invalid)
+
+    def bfs(self, start: RowAndCol, end: RowAndCol, invalid: Collection[T] = set('#'),
+            bidirectional: bool = False) -> tuple[Point, ...]:
         '''Breadth-first search. Returns path from start to end,
         avoiding locations with invalid values (e.g. walls).
         If no path, returns empty tuple.'''
-        start = Point(*start)
-        end = Point(*end)
-        invalid = set(invalid)
-
-        def backtrack(prevs: Mapping[Point, Point|None], end: Point = end) -> tuple[Point, ...]:
-            path = [end]
-            while (prev := prevs[path[-1]]) is not None:
-                path.append(prev)
-            return tuple(reversed(path))
-
-        todo = [start]
-        prev: dict[Point, Point|None] = {start: None}
-        for here in todo:
-            for neighbor, value in self.neighbors(here):
-                if neighbor in prev or value in invalid:
-                    continue
-                prev[neighbor] = here
-                if neighbor == end:
-                    return tuple(backtrack(prev, end))
-                todo.append(neighbor)
-        else:  # Can't reach end from start
+        width = self.width
+        searcher = self.searcher()
+        start_i = start[0]*width + start[1]
+        end_i = end[0]*width + end[1]
+        if start_i == end_i:  # As it always has: no steps, so no path
             return ()
+        cells, invalid = self._bfs_cells(invalid)
+        if bidirectional:
+            path = searcher.bidirectional(start_i, end_i, cells, invalid)
+        else:
+            searcher.search((start_i,), cells, invalid, targets=(end_i,))
+            path = searcher.path(end_i)
+        return tuple(Point(*divmod(i, width)) for i in path)
+
+    def bfs_distances(self, starts: Iterable[RowAndCol], invalid: Collection[T] = set('#')) -> dict[Point, int]:
+        '''Steps to every reachable location from the nearest of starts,
+        avoiding locations with invalid values.'''
+        width = self.width
+        searcher = self.searcher()
+        searcher.search([r*width + c for r, c in starts], *self._bfs_cells(invalid))
+        return {Point(*divmod(i, width)): d for i, d in searcher.distances().items()}
 
 
 class Grid_Mutable[T](list[list[T]], _Grid[T]):
@@ -458,6 +795,335 @@ class Grid_Immutable[T](tuple[tuple[T, ...], ...], _Grid):
             return None
 
 
+_CHR: tuple[str, ...] = tuple(chr(i) for i in range(256))
+
+class _Row[T](Sequence[T]):
+    '''One row of a Grid_Flat, as a view: reads and writes go to the grid's cells,
+    so grid[row][col] = value works as it does on Grid_Mutable.'''
+
+    def __init__(self, grid: Grid_Flat[T], row_no: int) -> None:
+        self._grid = grid
+        self._start = row_no * grid.width
+
+    def __len__(self) -> int:
+        return self._grid.width
+
+    def _index(self, col: int) -> int:
+        if col < 0:
+            col += self._grid.width
+        if not 0 <= col < self._grid.width:
+            raise IndexError('col index out of range')
+        return self._start + col
+
+    @overload
+    def __getitem__(self, col: int) -> T: ...
+    @overload
+    def __getitem__(self, col: slice) -> list[T]: ...
+
+    def __getitem__(self, col):
+        if isinstance(col, slice):
+            return list(self)[col]
+        return self._grid.value_at(self._index(col))
+
+    def __setitem__(self, col: int, value: T) -> None:
+        self._grid.set_at(self._index(col), value)
+
+    def __iter__(self) -> Iterator[T]:
+        grid = self._grid
+        return map(grid._decode, grid.cells[self._start : self._start + grid.width])
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, str):
+            return self._grid._chars and str(self) == other
+        if isinstance(other, Sequence):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __str__(self) -> str:
+        '''The row's characters, for a character grid; otherwise like a list.'''
+        return ''.join(self) if self._grid._chars else str(list(self))  # type: ignore
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({list(self)!r})'
+
+class Grid_Flat[T](_Grid[T]):
+    '''Represent a 2D grid as one flat array, addressed by index = row*width + col.
+    Single characters are stored in a bytearray, ints (or bools, or other int types) in an array('q'),
+    anything else in a list; values come back as the type they went in as.
+    Same API as Grid_Mutable, plus index-based fast paths (*_index, *_indices).'''
+
+    def __init__[T_in](self,
+                       grid: Iterable[Iterable[T_in]]|str,
+                       transformer: Callable[[T_in], T] = lambda x: x):
+        if isinstance(grid, str):
+            grid = grid.splitlines()
+        rows = [[transformer(x) for x in row] for row in grid]
+        self.height: int = len(rows)
+        self.width: int = len(rows[0]) if rows else 0
+        flat = [x for row in rows for x in row]
+        if len(flat) != self.height * self.width:
+            raise ValueError('Rows are not all the same width')
+        self._chars: bool = all(isinstance(x, str) and len(x) == 1 and ord(x) < 256 for x in flat)
+        self.cells: bytearray|array[int]|list[T]
+        self._int_type: type|None = None  # To convert stored ints back to, if not plain ints
+        if self._chars:
+            self.cells = bytearray(map(ord, flat))  # type: ignore
+        else:
+            try:
+                self.cells = array('q', flat)  # type: ignore
+            except (TypeError, OverflowError):
+                self.cells = flat
+            else:
+                if flat and (kind := type(flat[0])) is not int and all(type(x) is kind for x in flat):
+                    self._int_type = kind
+
+    @property
+    def dimensions(self) -> RCPair:
+        return RCPair(self.height, self.width)
+
+    def __len__(self) -> int:
+        return self.height
+
+    @overload
+    def __getitem__(self, row_no: int) -> Sequence[T]: ...
+    @overload
+    def __getitem__(self, row_no: slice) -> list[Sequence[T]]: ...
+
+    def __getitem__(self, row_no):
+        '''grid[row] is a view of the row, so grid[row][col] and grid[row][col] = value work.'''
+        if isinstance(row_no, slice):
+            return [self[r] for r in range(*row_no.indices(self.height))]
+        if row_no < 0:
+            row_no += self.height
+        if not 0 <= row_no < self.height:
+            raise IndexError('row index out of range')
+        return _Row(self, row_no)
+
+    def __iter__(self) -> Iterator[Sequence[T]]:
+        for r in range(self.height):
+            yield self[r]
+
+    def __str__(self) -> str:
+        return '\n'.join(''.join(str(x) for x in row) for row in self)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Grid_Flat):
+            return NotImplemented
+        if self.dimensions != other.dimensions:
+            return False
+        if (self._chars, self._int_type) == (other._chars, other._int_type):
+            return self.cells == other.cells
+        return all(a == b for a, b in zip(map(self._decode, self.cells), map(other._decode, other.cells)))
+
+    def _encode(self, value: T) -> int|T|None:
+        '''Convert value to its stored form, or None if it can't be stored.'''
+        if self._chars:
+            return ord(value) if isinstance(value, str) and len(value) == 1 else None  # type: ignore
+        return value
+
+    def _decode(self, stored) -> T:
+        if self._chars:
+            return _CHR[stored]  # type: ignore
+        return self._int_type(stored) if self._int_type else stored  # type: ignore
+
+    # Index-based fast paths
+
+    def flat_index(self, row: int, col: int) -> int:
+        '''Flat index of (row, col). No bounds checking.'''
+        return row * self.width + col
+
+    def point(self, index: int) -> Point:
+        '''Point of flat index.'''
+        return Point(*divmod(index, self.width))
+
+    def value_at(self, index: int) -> T:
+        return self._decode(self.cells[index])
+
+    def set_at(self, index: int, value: T) -> None:
+        if (stored := self._encode(value)) is None:
+            raise TypeError(f'Can only store single characters in a character grid, not {value!r}')
+        self.cells[index] = stored  # type: ignore
+
+    def find_index(self, target: T) -> int:
+        '''Flat index of first cell with value target. Raises ValueError if not found.'''
+        if (stored := self._encode(target)) is None:
+            raise ValueError(f'{target!r} is not in grid')
+        return self.cells.index(stored)  # type: ignore
+
+    def find_all_indices(self, target: T) -> Generator[int]:
+        if (stored := self._encode(target)) is None:
+            return
+        cells = self.cells
+        i = -1
+        try:
+            while True:
+                i = cells.index(stored, i+1)  # type: ignore
+                yield i
+        except ValueError:
+            return
+
+    def neighbor_indices(self, index: int) -> Generator[int]:
+        '''Flat indices of in-bounds rectilinear neighbors, in order N, E, S, W.'''
+        for neighbor in self.neighbor_table()[index*4:index*4+4]:
+            if neighbor >= 0:
+                yield neighbor
+
+    def within_indices(self, index: int, radius: int, metric: str = 'taxi',
+                       min_distance: float = 1) -> Generator[tuple[int, float]]:
+        '''(flat index, distance) of every cell within radius of index; see stencil().'''
+        return stencil(radius, metric, min_distance).around(*divmod(index, self.width), self.height, self.width)
+
+    def _bfs_cells(self, invalid: Collection[T]) -> tuple[Any, Collection[Any]]:
+        return self.cells, {s for v in invalid if (s := self._encode(v)) is not None}
+
+    def bfs_indices(self, start: int, end: int, invalid: Collection[T] = set('#'),
+                    bidirectional: bool = False) -> list[int]:
+        '''Breadth-first search on flat indices. Returns path from start to end,
+        avoiding cells with invalid values. If no path, returns empty list.'''
+        searcher = self.searcher()
+        if bidirectional:
+            return searcher.bidirectional(start, end, *self._bfs_cells(invalid))
+        searcher.search((start,), *self._bfs_cells(invalid), targets=(end,))
+        return searcher.path(end)
+
+    def search_indices(self, starts: Iterable[int], invalid: Collection[T] = set('#'),
+                       targets: Collection[int] = (), all_targets: bool = False) -> GridBFS:
+        '''Breadth-first search on flat indices from all of starts, avoiding cells with invalid values;
+        see GridBFS.search(). Returns a copy of the searcher with its results, to read distances and paths from.'''
+        searcher = self.searcher()
+        searcher.search(starts, *self._bfs_cells(invalid), targets, all_targets)
+        return searcher.copy()
+
+    def regions(self, key: Callable[[T], Any]|None = None) -> Regions:
+        '''Label all connected regions of equal value (or key(value)); see label_regions().'''
+        if self._int_type:
+            regions = label_regions(self.cells, self.height, self.width,
+                                    key and (lambda x: key(self._int_type(x))))  # type: ignore
+            return regions._replace(values=list(map(self._int_type, regions.values)))
+        if not self._chars:
+            return label_regions(self.cells, self.height, self.width, key)
+        if key is not None:
+            return label_regions(self.cells, self.height, self.width, lambda x: key(_CHR[x]))
+        regions = label_regions(self.cells, self.height, self.width)
+        return regions._replace(values=[_CHR[x] for x in regions.values])
+
+    def contiguous_indices(self, origin: int) -> list[int]:
+        '''Sorted flat indices of cells connected to origin with the same value.'''
+        cells = self.cells
+        table = self.neighbor_table()
+        value = cells[origin]
+        members = {origin}
+        stack = [origin]
+        while stack:
+            here = stack.pop()
+            for neighbor in table[here*4:here*4+4]:
+                if neighbor >= 0 and neighbor not in members and cells[neighbor] == value:
+                    members.add(neighbor)
+                    stack.append(neighbor)
+        return sorted(members)
+
+    # Point-based API, same as _Grid
+
+    def get_row(self, row_no: int) -> Sequence[T]|None:
+        try:
+            return self[row_no]
+        except IndexError:
+            return None
+
+    def get_col(self, col_no: int) -> Sequence[T]|None:
+        if not 0 <= col_no < self.width:
+            return None
+        col = self.cells[col_no::self.width]
+        if self._chars:
+            return col.decode('latin-1')  # type: ignore
+        return list(map(self._decode, col)) if self._int_type else col  # type: ignore
+
+    def in_bounds(self, *point) -> bool:  # type: ignore[override]
+        row, col = point[0] if len(point) == 1 else point
+        return 0 <= row < self.height and 0 <= col < self.width
+
+    def get_value(self, *point) -> T:  # type: ignore[override]
+        row, col = point[0] if len(point) == 1 else point
+        if not (0 <= row < self.height and 0 <= col < self.width):
+            raise IndexError
+        return self._decode(self.cells[row * self.width + col])
+
+    def get_point(self, point: Point|RowAndCol) -> T|None:
+        row, col = point
+        if not (0 <= row < self.height and 0 <= col < self.width):
+            return None
+        return self._decode(self.cells[row * self.width + col])
+
+    def set_point(self, point: Point|RowAndCol, value: T) -> None:
+        row, col = point
+        if not (0 <= row < self.height and 0 <= col < self.width):
+            raise IndexError
+        self.set_at(row * self.width + col, value)
+
+    def iter_all(self) -> Generator[tuple[Point, T]]:
+        width = self.width
+        for i, stored in enumerate(self.cells):
+            yield Point(*divmod(i, width)), self._decode(stored)
+
+    def find(self, target: T) -> Point:
+        return self.point(self.find_index(target))
+
+    def find_all(self, target: T) -> Generator[Point]:
+        for i in self.find_all_indices(target):
+            yield self.point(i)
+
+    def neighbors(self, *point, distance: int = 1) -> Generator[tuple[Point, T]]:  # type: ignore[override]
+        row, col = point[0] if len(point) == 1 else point
+        for d_row, d_col in ((-distance, 0), (0, distance), (distance, 0), (0, -distance)):
+            r, c = row + d_row, col + d_col
+            if 0 <= r < self.height and 0 <= c < self.width:
+                yield Point(r, c), self._decode(self.cells[r * self.width + c])
+
+    def contiguous(self, *origin) -> tuple[Point, ...]:  # type: ignore[override]
+        row, col = origin[0] if len(origin) == 1 else origin
+        return tuple(map(self.point, self.contiguous_indices(self.flat_index(row, col))))
+
+    def bfs(self, start: RowAndCol, end: RowAndCol, invalid: Collection[T] = set('#'),
+            bidirectional: bool = False) -> tuple[Point, ...]:
+        '''Breadth-first search. Returns path from start to end,
+        avoiding locations with invalid values (e.g. walls).
+        If no path, returns empty tuple.'''
+        if tuple(start) == tuple(end):  # Like _Grid.bfs: no steps, so no path
+            return ()
+        path = self.bfs_indices(self.flat_index(*start), self.flat_index(*end), invalid, bidirectional)
+        return tuple(map(self.point, path))
+
+    @singledispatchmethod
+    def rotate(self, degrees: int) -> None:
+        cells, height, width = self.cells, self.height, self.width
+        match degrees:
+            case 0:
+                return
+            case 90 | -270:
+                cols = (cells[c::width][::-1] for c in range(width))
+            case 180 | -180:
+                self.cells = cells[::-1]
+                return
+            case 270 | -90:
+                cols = (cells[c::width] for c in reversed(range(width)))
+            case other:
+                raise NotImplementedError(f'Cannot rotate by {other} degrees.')
+        rotated = cells[:0]
+        for col in cols:
+            rotated += col  # type: ignore
+        self.cells = rotated
+        self.height, self.width = width, height
+    @rotate.register
+    def _(self, initial: Direction, final: Direction) -> None:
+        if initial == final:  # cross product will be 0, same as 180
+            return
+        match initial.cross(final):
+            case -1: return self.rotate(90)
+            case  0: return self.rotate(180)
+            case  1: return self.rotate(270)
+        raise NotImplementedError(f'Cannot rotate; orthogonal only')
+
+
 class Grid_Sparse[T](dict[Point, T]):
     '''Represent a 2D grid as a dictionary of points to values.'''
 
@@ -508,6 +1174,13 @@ class Grid_Sparse[T](dict[Point, T]):
             return True
         return point.row in range(self.dimensions.row) and point.col in range(self.dimensions.col)
 
+    def neighbor_table(self, connectivity: int|Steps = 4) -> array[int]:
+        '''Adjacency table in flat indices (row*width + col); see neighbor_table().
+        Needs fixed dimensions.'''
+        if self.dimensions is None:
+            raise ValueError('Grid_Sparse without dimensions has no neighbor table')
+        return neighbor_table(*self.dimensions, connectivity)
+
     @singledispatchmethod
     def neighbors(self, point: Point|RowAndCol) -> Generator[tuple[Point, T]]:
         STEPS = (Velocity(-1, 0), Velocity(0, 1), Velocity(1, 0), Velocity(0, -1))
@@ -526,10 +1199,48 @@ class Grid_Sparse[T](dict[Point, T]):
             if val == target:
                 yield point
 
-    def bfs(self, start: RowAndCol, end: RowAndCol, invalid: Collection[T] = set('#')) -> tuple[Point, ...]:
+    def searcher(self, connectivity: int|Steps = 4) -> GridBFS:
+        '''This grid's reusable breadth-first search on flat indices (row*width + col); see GridBFS.
+        Needs fixed dimensions.'''
+        if self.dimensions is None:
+            raise ValueError('Grid_Sparse without dimensions has no flat indices')
+        return _own_searcher(self, *self.dimensions, connectivity)
+
+    def _bfs_cells(self, invalid: Collection[T]) -> tuple[Any, Collection[Any]]:
+        width, bg_out = self.dimensions.col, self.bg_out  # type: ignore
+        # Plain (row, col) tuples hash the same as Points
+        return _FlatView(lambda i: self.get(divmod(i, width), bg_out)), set(invalid)  # type: ignore
+
+    def bfs(self, start: RowAndCol, end: RowAndCol, invalid: Collection[T] = set('#'),
+            bidirectional: bool = False) -> tuple[Point, ...]:
         '''Breadth-first search. Returns path from start to end,
         avoiding locations with invalid values (e.g. walls).
         If no path, returns empty tuple.'''
+        if self.dimensions is None:
+            return self._bfs_unbounded(start, end, invalid)
+        width = self.dimensions.col
+        searcher = self.searcher()
+        start_i = start[0]*width + start[1]
+        end_i = end[0]*width + end[1]
+        if start_i == end_i:  # As it always has: no steps, so no path
+            return ()
+        cells, invalid = self._bfs_cells(invalid)
+        if bidirectional:
+            path = searcher.bidirectional(start_i, end_i, cells, invalid)
+        else:
+            searcher.search((start_i,), cells, invalid, targets=(end_i,))
+            path = searcher.path(end_i)
+        return tuple(Point(*divmod(i, width)) for i in path)
+
+    def bfs_distances(self, starts: Iterable[RowAndCol], invalid: Collection[T] = set('#')) -> dict[Point, int]:
+        '''Steps to every reachable location from the nearest of starts,
+        avoiding locations with invalid values. Needs fixed dimensions.'''
+        searcher = self.searcher()
+        width = self.dimensions.col  # type: ignore
+        searcher.search([r*width + c for r, c in starts], *self._bfs_cells(invalid))
+        return {Point(*divmod(i, width)): d for i, d in searcher.distances().items()}
+
+    def _bfs_unbounded(self, start: RowAndCol, end: RowAndCol, invalid: Collection[T] = set('#')) -> tuple[Point, ...]:
         start = Point(*start)
         end = Point(*end)
         invalid = set(invalid)
@@ -557,6 +1268,52 @@ class Grid_Sparse[T](dict[Point, T]):
 
 
 
+class Grid_Directions:
+    '''
+    Which directions a beam, guard, etc. has passed each cell of a grid in:
+    Direction flags (their values, 1-8, or any other bits) in a bytearray, one byte per cell.
+    Cells are flat indices, row * width + col, as in Grid_Flat.
+    For a simulation run over and over, reset() clears it in place, rather than making a new one.
+    '''
+
+    def __init__(self, height: int, width: int) -> None:
+        self.height = height
+        self.width = width
+        self.cells = bytearray(height * width)
+        self._blank = bytes(height * width)
+
+    def flat_index(self, row: int, col: int) -> int:
+        return row * self.width + col
+
+    def add(self, i: int, flag: int) -> bool:
+        '''Mark cell i as passed in direction flag. Return whether it wasn't already.'''
+        cell = self.cells[i]
+        if cell & flag:
+            return False
+        self.cells[i] = cell | flag
+        return True
+
+    def test(self, i: int, flag: int) -> bool:
+        return bool(self.cells[i] & flag)
+
+    def get(self, i: int) -> int:
+        return self.cells[i]
+
+    def count(self, flag: int|None = None) -> int:
+        '''How many cells have been passed at all (or in direction flag)?'''
+        if flag is None:
+            return len(self.cells) - self.cells.count(0)
+        return len(self.cells) - self.cells.translate(_has_flag_table(flag)).count(0)
+
+    def reset(self) -> None:
+        self.cells[:] = self._blank
+
+@cache
+def _has_flag_table(flag: int) -> bytes:
+    '''bytes.translate table mapping each byte to whether it has any of flag's bits'''
+    return bytes(bool(b & flag) for b in range(256))
+
+
 if __name__ == '__main__':
     print('test Grid creation:')
     for data in ([['a', 'b', 'c'], ['d', 'e', 'f'], ['g', 'h', 'i']],
@@ -0,0 +1,116 @@
+"""
+Maps that shift ranges of integers by different offsets, and sets of ranges.
+Ranges are Python ranges (step 1), so they're never expanded into numbers.
+"""
+
+from __future__ import annotations
+from bisect import bisect_right
+from collections.abc import Iterable, Iterator
+from math import inf
+
+
+def merge_ranges(ranges: Iterable[range]) -> list[range]:
+    '''Sorted, with overlapping and touching ranges joined, and empty ones dropped.'''
+    merged: list[range] = []
+    for r in sorted((r for r in ranges if r), key=lambda r: r.start):
+        if merged and r.start <= merged[-1].stop:
+            if r.stop > merged[-1].stop:
+                merged[-1] = range(merged[-1].start, r.stop)
+        else:
+            merged.append(r)
+    return merged
+
+
+class IntervalMap:
+    '''
+    A map on the integers that adds offsets[i] to each n from starts[i] up to starts[i+1]
+    (or on forever, for the last). Below starts[0], n maps to itself.
+    Lookups bisect the starts; maps compose into one map, and take whole ranges at once.
+    '''
+
+    def __init__(self, starts: Iterable[int] = (), offsets: Iterable[int] = ()) -> None:
+        self.starts: list[int] = list(starts)
+        self.offsets: list[int] = list(offsets)
+        if len(self.starts) != len(self.offsets):
+            raise ValueError('Need one offset per start')
+
+    @classmethod
+    def from_shifts(cls, shifts: Iterable[tuple[int, int, int]]) -> IntervalMap:
+        '''From (start, stop, offset) for non-overlapping ranges. Anything else maps to itself.'''
+        starts: list[int] = []
+        offsets: list[int] = []
+        prev_stop = -inf
+        for start, stop, offset in sorted(shifts):
+            if start < prev_stop:
+                raise ValueError(f'Ranges overlap at {start}')
+            if start > prev_stop and starts:
+                starts.append(prev_stop)  # A gap between ranges
+                offsets.append(0)
+            starts.append(start)
+            offsets.append(offset)
+            prev_stop = stop
+        if starts:
+            starts.append(prev_stop)
+            offsets.append(0)
+        return cls(starts, offsets)._simplified()
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self.starts}, {self.offsets})'
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, IntervalMap):
+            return NotImplemented
+        return (self.starts, self.offsets) == (other.starts, other.offsets)
+
+    def __call__(self, n: int) -> int:
+        i = bisect_right(self.starts, n) - 1
+        return n + self.offsets[i] if i >= 0 else n
+
+    def pieces(self, lo: float = -inf, hi: float = inf) -> Iterator[tuple[int, int, int]]:
+        '''(start, stop, offset) for each piece of the map from lo up to hi.'''
+        starts, offsets = self.starts, self.offsets
+        i = bisect_right(starts, lo) - 1
+        start = lo
+        while start < hi:
+            stop = min(starts[i + 1], hi) if i + 1 < len(starts) else hi
+            yield start, stop, offsets[i] if i >= 0 else 0  # type: ignore
+            start = stop
+            i += 1
+
+    def then(self, other: IntervalMap) -> IntervalMap:
+        '''The map n -> other(self(n)). Each piece of self is split where it lands
+        on other's starts, found by bisecting once and walking from there.'''
+        starts: list[int] = []
+        offsets: list[int] = []
+        for start, stop, offset in self.pieces():
+            for other_start, _, other_offset in other.pieces(start + offset, stop + offset):
+                starts.append(other_start - offset)
+                offsets.append(offset + other_offset)
+        return IntervalMap(starts, offsets)._simplified()
+
+    def image(self, ranges: Iterable[range]) -> list[range]:
+        '''Where ranges map to, as merged ranges.'''
+        return merge_ranges(range(start + offset, stop + offset)
+                            for r in ranges for start, stop, offset in self.pieces(r.start, r.stop))
+
+    def _simplified(self) -> IntervalMap:
+        '''Without pieces from -inf, and with neighbors of the same offset joined.'''
+        starts: list[int] = []
+        offsets: list[int] = []
+        for start, offset in zip(self.starts, self.offsets):
+            if start == -inf or offset == (offsets[-1] if offsets else 0):
+                continue
+            starts.append(start)
+            offsets.append(offset)
+        self.starts, self.offsets = starts, offsets
+        return self
+
+
+if __name__ == '__main__':
+    # seed-to-soil and soil-to-fertilizer, from 2023 day 5
+    seed_soil = IntervalMap.from_shifts([(98, 100, -48), (50, 98, 2)])
+    soil_fert = IntervalMap.from_shifts([(15, 52, -15), (52, 54, -15), (0, 15, 39)])
+    both = seed_soil.then(soil_fert)
+    print(both)
+    print([both(n) for n in (79, 14, 55, 13)], '= [81, 53, 57, 52]?')
+    print(both.image([range(79, 93), range(55, 68)]))
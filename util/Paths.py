@@ -0,0 +1,254 @@
+"""
+Weighted shortest paths on any graph: Dijkstra, A*, 0-1 BFS, and Dial's bucket queue.
+
+A graph is either a mapping of node -> {neighbor: weight},
+or a callback node -> iterable of (neighbor, weight).
+Every search records all optimal parents of each node (a DAG),
+so all best paths can be counted or enumerated afterward.
+"""
+
+from __future__ import annotations
+from collections import deque
+from collections.abc import Callable, Collection, Hashable, Iterable, Iterator, Mapping
+from dataclasses import dataclass, field
+from heapq import heappop, heappush
+from itertools import count
+from math import inf
+
+type Graph[N] = Mapping[N, Mapping[N, int]] | Callable[[N], Iterable[tuple[N, int]]]
+
+
+def _edges[N](graph: Graph[N]) -> Callable[[N], Iterable[tuple[N, int]]]:
+    if isinstance(graph, Mapping):
+        return lambda node: graph[node].items()
+    return graph
+
+def _starts[N](start: N|Collection[N], multi: bool) -> tuple[N, ...]:
+    return tuple(start) if multi else (start,)  # type: ignore
+
+
+@dataclass
+class ShortestPaths[N: Hashable]:
+    '''Result of a search: best cost to each reached node, and all optimal parents.
+    Costs are final for every node up to the cost of the best target
+    (or for all reachable nodes, if there were no targets).'''
+    starts: tuple[N, ...]
+    costs: dict[N, int] = field(default_factory=dict)
+    parents: dict[N, list[N]] = field(default_factory=dict)
+
+    def cost(self, node: N) -> int|float:
+        '''Best cost to node; inf if not reached.'''
+        return self.costs.get(node, inf)
+
+    def best(self, targets: Iterable[N]) -> int|float:
+        '''Best cost to any of targets.'''
+        return min((self.cost(t) for t in targets), default=inf)
+
+    def best_targets(self, targets: Iterable[N]) -> list[N]:
+        '''Those of targets reached at the best cost.'''
+        targets = list(targets)
+        best = self.best(targets)
+        return [t for t in targets if best != inf and self.cost(t) == best]
+
+    def path(self, target: N) -> list[N]:
+        '''One optimal path from a start to target; empty if not reached.'''
+        if target not in self.costs:
+            return []
+        path = [target]
+        while parents := self.parents[path[-1]]:
+            path.append(parents[0])
+        return path[::-1]
+
+    def paths(self, targets: N|Iterable[N], multi: bool = False) -> Iterator[list[N]]:
+        '''Enumerate every optimal path from a start to the best of targets.
+        Pass one target, or an iterable of targets with multi=True.'''
+        ends = self.best_targets(_starts(targets, multi))
+        stack = [[end] for end in ends]
+        while stack:
+            path = stack.pop()
+            if not (parents := self.parents[path[-1]]):
+                yield path[::-1]
+                continue
+            stack.extend(path + [parent] for parent in parents)
+
+    def on_paths(self, targets: N|Iterable[N], multi: bool = False) -> set[N]:
+        '''All nodes on any optimal path to the best of targets, without enumerating paths.'''
+        seen = set(self.best_targets(_starts(targets, multi)))
+        stack = list(seen)
+        while stack:
+            for parent in self.parents[stack.pop()]:
+                if parent not in seen:
+                    seen.add(parent)
+                    stack.append(parent)
+        return seen
+
+    def count_paths(self, targets: N|Iterable[N], multi: bool = False) -> int:
+        '''Number of distinct optimal paths to the best of targets, without enumerating them.'''
+        ends = self.best_targets(_starts(targets, multi))
+        ways: dict[N, int] = {}
+        stack = list(ends)
+        while stack:  # post-order over the parent DAG
+            node = stack[-1]
+            if node in ways:
+                stack.pop()
+            elif pending := [p for p in self.parents[node] if p not in ways]:
+                stack.extend(pending)
+            else:
+                stack.pop()
+                ways[node] = sum(ways[p] for p in self.parents[node]) or 1
+        return sum(ways[end] for end in ends)
+
+    def _relax(self, node: N, neighbor: N, cost: int) -> bool:
+        '''Record an edge node -> neighbor reaching neighbor at cost.
+        Return whether it's a new best.
+        A tie by a 0-cost edge isn't recorded if neighbor is already on node's parent chain
+        (as a start always is), so 0-cost cycles never make the parents cyclic.'''
+        best = self.costs.get(neighbor, inf)
+        if cost < best:
+            self.costs[neighbor] = cost
+            self.parents[neighbor] = [node]
+            return True
+        if (cost == best and node not in self.parents[neighbor]
+                and (self.costs[node] < cost or not self._has_ancestor(node, neighbor))):
+            self.parents[neighbor].append(node)
+        return False
+
+    def _has_ancestor(self, node: N, ancestor: N) -> bool:
+        '''Is ancestor on a parent chain of node? Only 0-cost steps are followed,
+        since node and ancestor cost the same. A node is its own ancestor.'''
+        if node == ancestor:
+            return True
+        cost = self.costs[ancestor]
+        seen = {node}
+        stack = [node]
+        while stack:
+            for parent in self.parents[stack.pop()]:
+                if parent == ancestor:
+                    return True
+                if parent not in seen and self.costs[parent] == cost:
+                    seen.add(parent)
+                    stack.append(parent)
+        return False
+
+def dijkstra[N](start: N|Collection[N], graph: Graph[N],
+                targets: Collection[N] = (),
+                heuristic: Callable[[N], int]|None = None,
+                multi: bool = False) -> ShortestPaths[N]:
+    '''Dijkstra's algorithm from start (or each of start, with multi=True).
+    With targets, stop once nothing cheaper than the best target remains.
+    With a heuristic (a consistent lower bound on cost to the targets), this is A*.'''
+    edges = _edges(graph)
+    targets = set(targets)
+    result = ShortestPaths(_starts(start, multi))
+    tiebreak = count()
+    todo: list[tuple[int, int, N]] = []
+    for node in result.starts:
+        result.costs[node] = 0
+        result.parents[node] = []
+        heappush(todo, (heuristic(node) if heuristic else 0, next(tiebreak), node))
+    done = set()
+    best = inf
+    while todo:
+        priority, _, node = heappop(todo)
+        if priority > best:
+            break
+        if node in done:
+            continue
+        done.add(node)
+        cost_here = result.costs[node]
+        if node in targets:
+            best = min(best, cost_here)
+        for neighbor, weight in edges(node):
+            if result._relax(node, neighbor, cost_there := cost_here + weight):
+                heappush(todo, (cost_there + (heuristic(neighbor) if heuristic else 0),
+                                next(tiebreak), neighbor))
+    return result
+
+def astar[N](start: N|Collection[N], graph: Graph[N],
+             targets: Collection[N], heuristic: Callable[[N], int],
+             multi: bool = False) -> ShortestPaths[N]:
+    '''A* search: Dijkstra's algorithm, prioritized by cost + heuristic.
+    The heuristic must be consistent (never overestimate, even step to step).'''
+    return dijkstra(start, graph, targets=targets, heuristic=heuristic, multi=multi)
+
+def bfs_01[N](start: N|Collection[N], graph: Graph[N],
+              targets: Collection[N] = (), multi: bool = False) -> ShortestPaths[N]:
+    '''0-1 BFS: shortest paths where every weight is 0 or 1, using a deque instead of a heap.'''
+    edges = _edges(graph)
+    targets = set(targets)
+    result = ShortestPaths(_starts(start, multi))
+    todo: deque[tuple[int, N]] = deque()
+    for node in result.starts:
+        result.costs[node] = 0
+        result.parents[node] = []
+        todo.append((0, node))
+    best = inf
+    while todo:
+        cost_here, node = todo.popleft()
+        if cost_here > best:
+            break
+        if cost_here > result.costs[node]:  # stale entry
+            continue
+        if node in targets:
+            best = min(best, cost_here)
+        for neighbor, weight in edges(node):
+            if result._relax(node, neighbor, cost_here + weight):
+                if weight == 0:
+                    todo.appendleft((cost_here, neighbor))
+                elif weight == 1:
+                    todo.append((cost_here + 1, neighbor))
+                else:
+                    raise ValueError(f'0-1 BFS needs weights of 0 or 1, not {weight}')
+    return result
+
+def dial[N](start: N|Collection[N], graph: Graph[N], max_weight: int,
+            targets: Collection[N] = (), multi: bool = False) -> ShortestPaths[N]:
+    '''Dial's algorithm: Dijkstra with a circular array of buckets instead of a heap,
+    for small non-negative integer weights up to max_weight.'''
+    edges = _edges(graph)
+    targets = set(targets)
+    result = ShortestPaths(_starts(start, multi))
+    n_buckets = max_weight + 1
+    buckets: list[list[N]] = [[] for _ in range(n_buckets)]
+    for node in result.starts:
+        result.costs[node] = 0
+        result.parents[node] = []
+        buckets[0].append(node)
+    pending = len(result.starts)
+    cost_here = 0
+    best = inf
+    while pending and cost_here <= best:
+        bucket = buckets[cost_here % n_buckets]
+        while bucket:  # 0-weight edges can add to the current bucket
+            node = bucket.pop()
+            pending -= 1
+            if result.costs[node] != cost_here:  # stale entry
+                continue
+            if node in targets:
+                best = min(best, cost_here)
+            for neighbor, weight in edges(node):
+                if weight > max_weight:
+                    raise ValueError(f'Weight {weight} is over max_weight {max_weight}')
+                if result._relax(node, neighbor, cost_here + weight):
+                    buckets[(cost_here + weight) % n_buckets].append(neighbor)
+                    pending += 1
+        cost_here += 1
+    return result
+
+
+if __name__ == '__main__':
+    graph = {'a': {'b': 1, 'c': 1}, 'b': {'d': 1}, 'c': {'d': 1}, 'd': {'e': 0}, 'e': {}}
+    for search in (dijkstra, bfs_01):
+        found = search('a', graph, targets={'e'})
+        print(search.__name__, found.cost('e'), list(found.paths('e')), found.count_paths('e'))
+    found = dial('a', graph, max_weight=1, targets={'e'})
+    print('dial', found.cost('e'), sorted(found.on_paths('e')))
+    # 0-weight cycles, through the start or not, mustn't make the parents cyclic
+    cycle = {0: {1: 0}, 1: {0: 0, 2: 1}, 2: {}}
+    away = {0: {1: 1}, 1: {2: 0}, 2: {1: 0, 3: 1}, 3: {}}
+    for search in (dijkstra, bfs_01, lambda start, graph: dial(start, graph, max_weight=1)):
+        found = search(0, cycle)
+        print(found.parents, found.count_paths(2), '= {0: [], 1: [0], 2: [1]} 1?')
+        found = search(0, away)
+        print(found.parents, found.count_paths(3), list(found.paths(3)), sorted(found.on_paths(3)),
+              '= {0: [], 1: [0], 2: [1], 3: [2]} 1 [[0, 1, 2, 3]] [0, 1, 2, 3]?')
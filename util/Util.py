@@ -4,7 +4,8 @@
 Miscellaneous functions that I frequently want.
 """
 
-from collections.abc import Sequence
+from array import array
+from collections.abc import Callable, Hashable, Iterable, Sequence
 import sys
 from typing import Any
 
@@ -16,3 +17,98 @@ def find(sequence: Sequence, value: Any, start: int = 0, stop: int = sys.maxsize
         return sequence.index(value, start, stop)
     except ValueError:
         return -1
+
+
+class DisjointSet:
+    '''Union-find over the integers 0..n-1, with path halving and union by size.'''
+
+    def __init__(self, n: int) -> None:
+        self.parent: array[int] = array('l', range(n))
+        self.size: array[int] = array('l', [1]) * n
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    def find(self, x: int) -> int:
+        parent = self.parent
+        while (p := parent[x]) != x:
+            parent[x] = x = parent[p]
+        return x
+
+    def union(self, x: int, y: int) -> int:
+        '''Merge the sets containing x and y. Return the new root.'''
+        x, y = self.find(x), self.find(y)
+        if x == y:
+            return x
+        if self.size[x] < self.size[y]:
+            x, y = y, x
+        self.parent[y] = x
+        self.size[x] += self.size[y]
+        return x
+
+    def connected(self, x: int, y: int) -> bool:
+        return self.find(x) == self.find(y)
+
+
+def strongly_connected_components[N: Hashable](nodes: Iterable[N],
+                                               successors: Callable[[N], Iterable[N]]
+                                               ) -> list[list[N]]:
+    '''Tarjan's algorithm, without recursion. Components come out in reverse topological
+    order: every component's successors come before it, so results can be built up in order.'''
+    index: dict[N, int] = {}
+    low: dict[N, int] = {}
+    stack: list[N] = []
+    on_stack: set[N] = set()
+    components: list[list[N]] = []
+    for root in nodes:
+        if root in index:
+            continue
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(successors(root)))]
+        while work:
+            node, children = work[-1]
+            for child in children:
+                if child not in index:
+                    index[child] = low[child] = len(index)
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(successors(child))))
+                    break
+                if child in on_stack:
+                    low[node] = min(low[node], index[child])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+    return components
+
+
+def after_steps[S](state: S, step: Callable[[S], S], n: int,
+                   key: Callable[[S], Hashable]|None = None) -> S:
+    '''The state after n steps, skipping whole cycles once a state repeats.
+    Only keys are remembered, so step may update state in place and return it.'''
+    seen: dict[Hashable, int] = {}
+    i = 0
+    while i < n:
+        fingerprint = key(state) if key else state
+        if fingerprint in seen:
+            period = i - seen[fingerprint]
+            for _ in range((n - i) % period):
+                state = step(state)
+            return state
+        seen[fingerprint] = i
+        state = step(state)
+        i += 1
+    return state